@@ -0,0 +1,39 @@
+from fastapi import Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+from models import RevokedToken
+from database import async_session
+from common.cache import TTLCache
+from common.revocation import create_revocation_list
+from common.tokens import decode_token
+import os
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/admin/login")
+
+# Кэш проверенных токенов: повторные запросы панели не проверяют подпись заново
+ADMIN_DECISION_CACHE_SIZE = int(os.getenv("ADMIN_DECISION_CACHE_SIZE", "1000"))
+ADMIN_DECISION_CACHE_TTL = float(os.getenv("ADMIN_DECISION_CACHE_TTL", "60"))
+
+decision_cache = TTLCache(maxsize=ADMIN_DECISION_CACHE_SIZE, ttl=ADMIN_DECISION_CACHE_TTL)
+
+# Токены, отозванные через /logout/ в user_service (нужен общий REVOCATION_BACKEND)
+revocation_list = create_revocation_list(async_session, RevokedToken)
+
+
+async def get_current_admin(token: str = Depends(oauth2_scheme)) -> dict:
+    # Роль берётся из подписанного токена, без обращения к RabbitMQ и БД
+    payload = decision_cache.get(token)
+    if payload is None:
+        payload = decode_token(token)
+        decision_cache.set(token, payload, expires_at=payload.get("exp"))
+    # Отзыв не кэшируется: после /logout/ токен перестаёт действовать сразу,
+    # обычно это проверка локального Bloom-фильтра
+    if await revocation_list.is_token_revoked(token, payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if payload.get("role") != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="Пользователь не являеться администратором")
+    return payload
@@ -1,13 +1,13 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
-import os
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from common.database import create_engine_from_env, pool_statistics as engine_pool_statistics
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+SERVICE_NAME = "admin_service"
 
-if DATABASE_URL is None:
-    raise ValueError("DATABASE_URL не установлен. Проверьте настройки в docker-compose.yml")
+# Статистика и аналитика читают большие таблицы, поэтому таймаут больше, чем у других сервисов
+DEFAULT_STATEMENT_TIMEOUT_MS = 30000
 
 # Создаем асинхронный движок
-engine = create_async_engine(DATABASE_URL, echo=True)
+engine = create_engine_from_env(SERVICE_NAME, DEFAULT_STATEMENT_TIMEOUT_MS)
 
 # Создаем асинхронную сессию
 async_session = async_sessionmaker(
@@ -15,6 +15,10 @@ async_session = async_sessionmaker(
 )
 
 
+def pool_statistics() -> dict:
+    return engine_pool_statistics(engine)
+
+
 # Функция для получения сессии
 async def get_session():
     async with async_session() as session:
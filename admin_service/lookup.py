@@ -0,0 +1,125 @@
+"""Выборка пользователей и задач по списку id для админ-панели.
+
+Весь список id уходит в Postgres одним параметром-массивом (id = ANY(:ids)),
+поэтому текст запроса не зависит от числа id и переиспользуется кэшем
+подготовленных выражений. Найденные строки кэшируются по id на
+ADMIN_LOOKUP_CACHE_TTL секунд, отсутствующие id - тоже, чтобы частые
+обновления панели не доходили до БД.
+"""
+from fastapi import HTTPException, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import Integer, any_, literal
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from typing import Dict, Iterable, List, Optional
+from common.cache import TTLCache
+from common.metrics import register_cache
+from database import async_session
+import hashlib
+import json
+import os
+
+ADMIN_LOOKUP_CACHE_SIZE = int(os.getenv("ADMIN_LOOKUP_CACHE_SIZE", "50000"))
+ADMIN_LOOKUP_CACHE_TTL = float(os.getenv("ADMIN_LOOKUP_CACHE_TTL", "5"))
+# Больше id за запрос - ответ отдаётся потоком, запросы в БД идут частями
+ADMIN_LOOKUP_CHUNK = int(os.getenv("ADMIN_LOOKUP_CHUNK", "1000"))
+
+# Отметка "такого id нет" в кэше (None у TTLCache означает промах)
+_MISSING = False
+
+lookup_caches: Dict[str, TTLCache] = {}
+
+
+def _cache_for(model) -> TTLCache:
+    cache = lookup_caches.get(model.__tablename__)
+    if cache is None:
+        cache = TTLCache(maxsize=ADMIN_LOOKUP_CACHE_SIZE, ttl=ADMIN_LOOKUP_CACHE_TTL)
+        lookup_caches[model.__tablename__] = cache
+        register_cache(f"admin_lookup_{model.__tablename__}", cache)
+    return cache
+
+
+def unique_ids(ids: Iterable[int]) -> List[int]:
+    # Порядок первого появления сохраняется, повторы отбрасываются
+    return list(dict.fromkeys(ids))
+
+
+def chunks(ids: List[int], size: int = ADMIN_LOOKUP_CHUNK):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+async def fetch_by_ids(session: AsyncSession, model, schema, ids: List[int]) -> List[dict]:
+    """Строки model с данными id в порядке ids, уже проверенные и приведённые к schema.
+
+    Ответ собирается вручную (JSONResponse/поток), response_model эндпоинта
+    его не проверяет, поэтому каждая строка проходит schema здесь, до кэша.
+    """
+    cache = _cache_for(model)
+    found: Dict[int, Optional[dict]] = {}
+    missing = []
+    for id_ in ids:
+        row = cache.get(id_)
+        if row is None:
+            missing.append(id_)
+        else:
+            found[id_] = row
+
+    if missing:
+        result = await session.execute(select(model).where(model.id == any_(literal(missing, ARRAY(Integer)))))
+        for obj in result.scalars():
+            row = schema.model_validate({name: getattr(obj, name) for name in schema.model_fields})
+            found[obj.id] = row.model_dump(mode="json")
+        for id_ in missing:
+            cache.set(id_, found.setdefault(id_, _MISSING))
+
+    return [found[id_] for id_ in ids if found[id_] is not _MISSING]
+
+
+def make_etag(rows: List[dict]) -> str:
+    body = json.dumps(rows, sort_keys=True, ensure_ascii=False).encode()
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = {tag.strip()[2:] if tag.strip().startswith("W/") else tag.strip() for tag in if_none_match.split(",")}
+    return etag in tags
+
+
+async def _stream_rows(first_rows: List[dict], rest: List[List[int]], model, schema):
+    yield "[" + ",".join(json.dumps(row, ensure_ascii=False) for row in first_rows)
+    # Сессия запроса к этому моменту уже может быть закрыта, поэтому своя
+    async with async_session() as session:
+        for chunk in rest:
+            rows = await fetch_by_ids(session, model, schema, chunk)
+            if rows:
+                yield "," + ",".join(json.dumps(row, ensure_ascii=False) for row in rows)
+    yield "]"
+
+
+async def lookup_response(session: AsyncSession, model, schema, ids: List[int],
+                          if_none_match: Optional[str], not_found_detail: str) -> Response:
+    ids = unique_ids(ids)
+
+    if len(ids) <= ADMIN_LOOKUP_CHUNK:
+        rows = await fetch_by_ids(session, model, schema, ids)
+        if not rows:
+            raise HTTPException(status_code=404, detail=not_found_detail)
+        etag = make_etag(rows)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        return JSONResponse(rows, headers={"ETag": etag})
+
+    # Большой список: первую непустую часть читаем сразу, чтобы успеть ответить 404,
+    # остальное отдаём потоком без ETag
+    parts = list(chunks(ids))
+    while parts:
+        rows = await fetch_by_ids(session, model, schema, parts.pop(0))
+        if rows:
+            return StreamingResponse(_stream_rows(rows, parts, model, schema), media_type="application/json")
+    raise HTTPException(status_code=404, detail=not_found_detail)
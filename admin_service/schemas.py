@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class TaskRead(BaseModel):
@@ -24,6 +24,7 @@ class UserRead(BaseModel):
 
 class TaskNumber(BaseModel):
     number: int
+    approximate: bool = False
 
     class Config:
         orm_mode = True
@@ -33,3 +34,36 @@ class CollectionNumber(BaseModel):
     task_n: int
     awr_task_n: int
     date: Optional[datetime]
+
+
+class SeriesStat(BaseModel):
+    min: int
+    max: int
+    avg: float
+
+
+class StatsBucket(BaseModel):
+    bucket: datetime
+    samples: int
+    users_n: SeriesStat
+    task_n: SeriesStat
+    awr_task_n: SeriesStat
+
+
+class HeavyUser(BaseModel):
+    user_id: int
+    tasks: int
+    done: int
+
+
+class TaskDistribution(BaseModel):
+    users_n: int
+    task_n: int
+    done_n: int
+    p50: float
+    p90: float
+    p99: float
+    max: int
+    completion_ratio: float
+    top_users: List[HeavyUser]
+    date: datetime
@@ -1,12 +1,16 @@
 from fastapi import Depends
+from sqlalchemy import JSON, func, text
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from models import User, Task
-from database import get_session
+from models import User, Task, ServerStatus, TaskDistribution
+from database import get_session, async_session
 
+import asyncio
 import datetime
 import logging
+import os
 
 # Настройка логирования
 logging.basicConfig(
@@ -18,11 +22,28 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Период автоматического снимка статистики в секундах, 0 - отключить
+STATS_SNAPSHOT_INTERVAL = int(os.getenv("STATS_SNAPSHOT_INTERVAL", "3600"))
+# Ключ pg advisory lock, чтобы при нескольких воркерах снимок делал только один
+STATS_SNAPSHOT_LOCK_KEY = 7301
+
+SERIES_BUCKETS = ("hour", "day")
+
+# Сохранять ли вместе с плановым снимком распределение задач по пользователям
+STATS_SNAPSHOT_DISTRIBUTION = os.getenv("STATS_SNAPSHOT_DISTRIBUTION", "0") == "1"
+DISTRIBUTION_TOP_N = int(os.getenv("DISTRIBUTION_TOP_N", "10"))
+
 
 async def collection_data(session: AsyncSession = Depends(get_session)):
-    user_n = await collection_user(session)
-    task_n = await collection_task(session)
-    awr_task = int(task_n // user_n)
+    # Оба счётчика одним запросом
+    result = await session.execute(
+        select(
+            select(func.count()).select_from(User).scalar_subquery(),
+            select(func.count()).select_from(Task).scalar_subquery(),
+        )
+    )
+    user_n, task_n = result.one()
+    awr_task = task_n // user_n if user_n else 0
 
     result = {"user_n": user_n,
               "task_n": task_n,
@@ -32,16 +53,159 @@ async def collection_data(session: AsyncSession = Depends(get_session)):
     return result
 
 
-async def collection_task(session: AsyncSession = Depends(get_session)):
-    result = await session.execute(select(Task))
-    number = int(len(result.scalars().all()))
+async def save_snapshot(session: AsyncSession):
+    result = await collection_data(session)
+
+    new_stat = ServerStatus(
+        users_n=result.get("user_n"),
+        task_n=result.get("task_n"),
+        awr_task_n=result.get("awr_task_n"),
+        date=result.get("date"),
+    )
+    session.add(new_stat)
+    await session.commit()
+
+    return new_stat
+
+
+async def collection_distribution(session: AsyncSession, top: int = DISTRIBUTION_TOP_N):
+    """Распределение числа задач по пользователям одним запросом.
+
+    Пользователи без задач учитываются с нулём (LEFT JOIN), поэтому
+    перцентили описывают всех пользователей, а не только активных.
+    """
+    per_user = (
+        select(
+            User.id.label("user_id"),
+            func.count(Task.id).label("tasks"),
+            func.count(Task.id).filter(Task.checked).label("done"),
+        )
+        .select_from(User)
+        .outerjoin(Task, Task.user_id == User.id)
+        .group_by(User.id)
+        .subquery()
+    )
+    ranked = select(
+        per_user,
+        func.row_number().over(order_by=(per_user.c.tasks.desc(), per_user.c.user_id)).label("rank"),
+    ).subquery()
+
+    def percentile(fraction: float):
+        return func.percentile_cont(fraction).within_group(ranked.c.tasks)
+
+    top_user = func.json_build_object("user_id", ranked.c.user_id, "tasks", ranked.c.tasks, "done", ranked.c.done)
+    query = select(
+        func.count().label("users_n"),
+        func.coalesce(func.sum(ranked.c.tasks), 0).label("task_n"),
+        func.coalesce(func.sum(ranked.c.done), 0).label("done_n"),
+        func.coalesce(percentile(0.5), 0).label("p50"),
+        func.coalesce(percentile(0.9), 0).label("p90"),
+        func.coalesce(percentile(0.99), 0).label("p99"),
+        func.coalesce(func.max(ranked.c.tasks), 0).label("max"),
+        func.coalesce(func.sum(ranked.c.done) / func.nullif(func.sum(ranked.c.tasks), 0), 0).label("completion_ratio"),
+        func.coalesce(
+            func.json_agg(aggregate_order_by(top_user, ranked.c.rank)).filter(ranked.c.rank <= top),
+            text("'[]'::json"),
+            type_=JSON,
+        ).label("top_users"),
+    )
+    row = (await session.execute(query)).one()
+
+    result = dict(row._mapping)
+    for field in ("users_n", "task_n", "done_n", "max"):
+        result[field] = int(result[field])
+    for field in ("p50", "p90", "p99", "completion_ratio"):
+        result[field] = float(result[field])
+    result["date"] = datetime.datetime.now()
+
+    return result
+
+
+async def save_distribution(session: AsyncSession, distribution: dict):
+    session.add(TaskDistribution(**distribution))
+    await session.commit()
+
+
+async def take_scheduled_snapshot(interval: int):
+    async with async_session() as session:
+        locked = await session.scalar(
+            select(func.pg_try_advisory_xact_lock(STATS_SNAPSHOT_LOCK_KEY))
+        )
+        if not locked:
+            return None
+
+        # Другой воркер мог уже сделать снимок в этом интервале
+        last_date = await session.scalar(select(func.max(ServerStatus.date)))
+        if last_date is not None and datetime.datetime.now() - last_date < datetime.timedelta(seconds=interval / 2):
+            await session.rollback()
+            return None
+
+        if STATS_SNAPSHOT_DISTRIBUTION:
+            # Попадёт в ту же транзакцию, что и ServerStatus
+            session.add(TaskDistribution(**await collection_distribution(session)))
+        return await save_snapshot(session)
+
+
+async def snapshot_scheduler(interval: int = STATS_SNAPSHOT_INTERVAL):
+    logger.info(f"Планировщик снимков статистики запущен, интервал {interval} с")
+    while True:
+        try:
+            stat = await take_scheduled_snapshot(interval)
+            if stat is not None:
+                logger.info(f"Снимок статистики сохранён: users={stat.users_n} tasks={stat.task_n}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении снимка статистики: {e}")
+        await asyncio.sleep(interval)
+
+
+async def collection_series(session: AsyncSession, bucket: str,
+                            date_from: datetime.datetime = None, date_to: datetime.datetime = None):
+    period = func.date_trunc(bucket, ServerStatus.date).label("bucket")
+    query = select(
+        period,
+        func.count().label("samples"),
+        func.min(ServerStatus.users_n), func.max(ServerStatus.users_n), func.avg(ServerStatus.users_n),
+        func.min(ServerStatus.task_n), func.max(ServerStatus.task_n), func.avg(ServerStatus.task_n),
+        func.min(ServerStatus.awr_task_n), func.max(ServerStatus.awr_task_n), func.avg(ServerStatus.awr_task_n),
+    )
+    if date_from is not None:
+        query = query.where(ServerStatus.date >= date_from)
+    if date_to is not None:
+        query = query.where(ServerStatus.date < date_to)
+    query = query.group_by(period).order_by(period)
+
+    result = await session.execute(query)
+
+    series = []
+    for row in result.all():
+        series.append({
+            "bucket": row[0],
+            "samples": row[1],
+            "users_n": {"min": row[2], "max": row[3], "avg": float(row[4])},
+            "task_n": {"min": row[5], "max": row[6], "avg": float(row[7])},
+            "awr_task_n": {"min": row[8], "max": row[9], "avg": float(row[10])},
+        })
 
-    return number
+    return series
 
 
-async def collection_user(session: AsyncSession = Depends(get_session)):
-    result = await session.execute(select(User))
-    number = int(len(result.scalars().all()))
+async def count_rows(session: AsyncSession, model, approximate: bool = False):
+    """Возвращает (число строк, была ли это оценка).
 
-    return number
+    approximate=True берёт оценку планировщика из pg_class.reltuples - это O(1),
+    но значение обновляется только ANALYZE/autovacuum. Если таблица ещё ни разу
+    не анализировалась (reltuples = -1), выполняется точный COUNT(*).
+    """
+    if approximate:
+        result = await session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)"),
+            {"table_name": model.__tablename__},
+        )
+        estimate = result.scalar()
+        if estimate is not None and estimate >= 0:
+            return int(estimate), True
 
+    result = await session.execute(select(func.count()).select_from(model))
+    return int(result.scalar_one()), False
@@ -0,0 +1,148 @@
+"""Сравнение задержки определения пользователя в task_service.
+
+local  - проверка JWT внутри процесса (authmodul.get_current_user_id)
+broker - старая схема: user_service публикует id в очередь, task_service
+         открывает queue.iterator() и ждёт сообщение
+
+Если задан DATABASE_URL, к обоим вариантам добавляется запрос задач
+пользователя, т.е. измеряется полный путь чтения задач.
+Вариант broker запускается только если доступен RABBITMQ_URL.
+
+Запуск:
+    python benchmarks/bench_task_identity.py --iterations 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path[:0] = [os.path.join(ROOT, "task_service"), ROOT]
+
+# authmodul импортирует database ради списка отозванных токенов; движок не подключается
+# до первого запроса, поэтому без --database-url хватает адреса-заглушки
+DATABASE_URL = os.getenv("DATABASE_URL")
+os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://localhost/bench")
+
+from jose import jwt  # noqa: E402
+
+import authmodul  # noqa: E402
+from common.tokens import ALGORITHM, SECRET_KEY  # noqa: E402
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summary(samples):
+    ms = [s * 1000 for s in samples]
+    return {
+        "n": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 4),
+        "p50_ms": round(percentile(ms, 0.50), 4),
+        "p95_ms": round(percentile(ms, 0.95), 4),
+        "p99_ms": round(percentile(ms, 0.99), 4),
+    }
+
+
+def make_token(user_id):
+    payload = {
+        "sub": f"bench-{user_id}",
+        "user_id": user_id,
+        "exp": datetime.utcnow() + timedelta(minutes=30),
+    }
+    return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+
+
+async def make_task_query(database_url):
+    if not database_url:
+        return None, None
+
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    engine = create_async_engine(database_url)
+
+    async def query(user_id):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT id FROM tasks WHERE user_id = :uid"), {"uid": user_id})
+
+    return engine, query
+
+
+async def bench_local(iterations, user_id, query):
+    token = make_token(user_id)
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        uid = await authmodul.get_current_user_id(token)
+        if query:
+            await query(uid)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def bench_broker(iterations, user_id, query, rabbitmq_url):
+    import aio_pika
+
+    connection = await aio_pika.connect_robust(rabbitmq_url)
+    try:
+        channel = await connection.channel()
+        queue_name = f"bench_task_queue_{uuid.uuid4().hex}"
+        queue = await channel.declare_queue(queue_name, auto_delete=True)
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await channel.default_exchange.publish(
+                aio_pika.Message(body=f"{user_id}".encode()),
+                routing_key=queue_name,
+            )
+            async with queue.iterator() as queue_iter:
+                async for message in queue_iter:
+                    async with message.process():
+                        uid = int(message.body.decode())
+                    break
+            if query:
+                await query(uid)
+            samples.append(time.perf_counter() - start)
+        return samples
+    finally:
+        await connection.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--database-url", default=DATABASE_URL)
+    parser.add_argument("--rabbitmq-url", default=os.getenv("RABBITMQ_URL"))
+    args = parser.parse_args()
+
+    engine, query = await make_task_query(args.database_url)
+    report = {"iterations": args.iterations, "with_db": query is not None}
+    try:
+        report["local"] = summary(await bench_local(args.iterations, args.user_id, query))
+        if args.rabbitmq_url:
+            try:
+                samples = await bench_broker(args.iterations, args.user_id, query, args.rabbitmq_url)
+                report["broker"] = summary(samples)
+            except Exception as e:
+                report["broker"] = {"error": str(e)}
+        else:
+            report["broker"] = {"skipped": "RABBITMQ_URL не задан"}
+    finally:
+        if engine is not None:
+            await engine.dispose()
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
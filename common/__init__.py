@@ -0,0 +1,4 @@
+"""Модули, общие для user_service, task_service, admin_service и event_consumer.
+
+В образ каждого сервиса копируется каталогом common/ рядом с его main.py.
+"""
@@ -0,0 +1,72 @@
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+import os
+import time
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+if DATABASE_URL is None:
+    raise ValueError("DATABASE_URL не установлен. Проверьте настройки в docker-compose.yml")
+
+# Настройки пула; три сервиса делят один Postgres, суммарно (size + overflow) * воркеры < max_connections
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# Размер кэша подготовленных выражений asyncpg на одно соединение (0 - выключить, нужно для pgbouncer)
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "500"))
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+
+pool_stats = {"checkouts": 0, "timeouts": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0}
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    # Замеряет время выдачи соединения: ожидание свободного или открытие нового
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            pool_stats["timeouts"] += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            pool_stats["checkouts"] += 1
+            pool_stats["wait_seconds_total"] += waited
+            pool_stats["wait_seconds_max"] = max(pool_stats["wait_seconds_max"], waited)
+
+
+def create_engine_from_env(service_name: str, default_statement_timeout_ms: int = 5000) -> AsyncEngine:
+    # DB_STATEMENT_TIMEOUT_MS из окружения важнее значения по умолчанию сервиса
+    statement_timeout_ms = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", str(default_statement_timeout_ms)))
+    return create_async_engine(
+        DATABASE_URL,
+        echo=DB_ECHO,
+        poolclass=TimedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args={
+            "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+            "server_settings": {
+                "application_name": service_name,
+                "statement_timeout": str(statement_timeout_ms),
+            },
+        },
+    )
+
+
+def pool_statistics(engine: AsyncEngine) -> dict:
+    pool = engine.pool
+    return dict(
+        pool_stats,
+        size=pool.size(),
+        checked_out=pool.checkedout(),
+        checked_in=pool.checkedin(),
+        overflow=pool.overflow(),
+        max_overflow=DB_MAX_OVERFLOW,
+    )
@@ -0,0 +1,71 @@
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Optional
+import struct
+import time
+import uuid
+
+# Версия формата конверта; при несовместимых изменениях увеличивается
+EVENT_VERSION = 1
+EXCHANGE_NAME = "planingworks.events"
+CONTENT_TYPE = "application/x-planingworks-event"
+
+
+class EventType(IntEnum):
+    USER_REGISTERED = 1
+    USER_LOGGED_IN = 2
+    USER_LOGGED_OUT = 3
+    ADMIN_LOGGED_IN = 4
+    TASK_CREATED = 5
+
+
+# Routing key в topic exchange; потребители привязываются к нужным, например "user.*"
+ROUTING_KEYS = {
+    EventType.USER_REGISTERED: "user.registered",
+    EventType.USER_LOGGED_IN: "user.logged_in",
+    EventType.USER_LOGGED_OUT: "user.logged_out",
+    EventType.ADMIN_LOGGED_IN: "admin.logged_in",
+    EventType.TASK_CREATED: "task.created",
+}
+
+# version, type, user_id, task_id (-1 - нет), timestamp (мс), trace_id (16 байт): 42 байта
+_ENVELOPE = struct.Struct("!BBqqq16s")
+_NO_ID = -1
+
+
+@dataclass
+class Event:
+    type: EventType
+    user_id: int
+    task_id: Optional[int] = None
+    timestamp: float = field(default_factory=time.time)
+    trace_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+    @property
+    def routing_key(self) -> str:
+        return ROUTING_KEYS[self.type]
+
+    def encode(self) -> bytes:
+        return _ENVELOPE.pack(
+            EVENT_VERSION,
+            int(self.type),
+            self.user_id,
+            self.task_id if self.task_id is not None else _NO_ID,
+            int(self.timestamp * 1000),
+            uuid.UUID(hex=self.trace_id).bytes,
+        )
+
+    @classmethod
+    def decode(cls, body: bytes) -> "Event":
+        if len(body) < _ENVELOPE.size:
+            raise ValueError("Сообщение короче конверта события")
+        version, event_type, user_id, task_id, timestamp, trace_id = _ENVELOPE.unpack_from(body)
+        if version != EVENT_VERSION:
+            raise ValueError(f"Неподдерживаемая версия события: {version}")
+        return cls(
+            type=EventType(event_type),
+            user_id=user_id,
+            task_id=task_id if task_id != _NO_ID else None,
+            timestamp=timestamp / 1000,
+            trace_id=uuid.UUID(bytes=trace_id).hex,
+        )
@@ -0,0 +1,73 @@
+"""Потоковая выгрузка задач в NDJSON или CSV.
+
+Строки читаются серверным курсором пачками по EXPORT_BATCH_ROWS и сразу
+отдаются клиенту, поэтому память не растёт с размером выгрузки, а первый
+байт уходит без ожидания всего результата. Фабрику сессий передаёт сервис.
+"""
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.sql import Select
+import csv
+import io
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "1000"))
+EXPORT_FIELDS = ["id", "name", "description", "startime", "finishtime", "checked", "user_id", "version"]
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _value(task, field: str):
+    value = getattr(task, field)
+    if value is not None and field in ("startime", "finishtime"):
+        return value.isoformat()
+    return value
+
+
+def _ndjson(tasks) -> str:
+    return "".join(
+        json.dumps({field: _value(task, field) for field in EXPORT_FIELDS}, ensure_ascii=False) + "\n"
+        for task in tasks
+    )
+
+
+def _csv(tasks) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([_value(task, field) for field in EXPORT_FIELDS] for task in tasks)
+    return buffer.getvalue()
+
+
+async def _stream(session_factory: async_sessionmaker, query: Select, export_format: str):
+    encode = _ndjson if export_format == "ndjson" else _csv
+    if export_format == "csv":
+        yield ",".join(EXPORT_FIELDS) + "\r\n"
+
+    # Своя сессия: генератор выполняется уже после выхода из обработчика
+    async with session_factory() as session:
+        try:
+            result = await session.stream_scalars(query.execution_options(yield_per=EXPORT_BATCH_ROWS))
+            async for tasks in result.partitions():
+                yield encode(tasks)
+        except Exception as e:
+            # Заголовки уже отправлены, остаётся только оборвать выгрузку
+            logger.error(f"Ошибка выгрузки задач: {e}")
+            raise
+
+
+def export_response(session_factory: async_sessionmaker, query: Select, export_format: str,
+                    filename: str) -> StreamingResponse:
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="format должен быть ndjson или csv")
+    return StreamingResponse(
+        _stream(session_factory, query, export_format),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+    )
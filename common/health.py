@@ -0,0 +1,83 @@
+from fastapi import APIRouter, Response
+from functools import lru_cache
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# alembic.ini лежит в корне репозитория, в образе - рядом с каталогом common/
+ALEMBIC_CONFIG = os.getenv(
+    "ALEMBIC_CONFIG", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+)
+HEALTH_DB_TIMEOUT = float(os.getenv("HEALTH_DB_TIMEOUT", "2"))
+
+
+@lru_cache(maxsize=None)
+def expected_revision() -> str:
+    # Ревизия, под которую написан код сервиса: head цепочки миграций из migration/versions.
+    # DB_EXPECTED_REVISION - только для особых случаев, например при откате кода без отката схемы
+    revision = os.getenv("DB_EXPECTED_REVISION")
+    if revision:
+        return revision
+    # Импорт здесь: Alembic нужен один раз за процесс, а не при каждом импорте модуля
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    return ScriptDirectory.from_config(Config(ALEMBIC_CONFIG)).get_current_head()
+
+
+async def current_schema_revision(engine: AsyncEngine) -> str:
+    async with engine.connect() as conn:
+        result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+        return result.scalar()
+
+
+async def check_schema_revision(engine: AsyncEngine) -> bool:
+    # Вместо create_all на старте: один запрос к alembic_version
+    try:
+        revision = await asyncio.wait_for(current_schema_revision(engine), HEALTH_DB_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"Не удалось проверить ревизию схемы БД: {e}")
+        return False
+    if revision != expected_revision():
+        logger.error(f"Ревизия схемы БД {revision}, ожидается {expected_revision()}. Выполните alembic upgrade head")
+        return False
+    logger.info(f"Ревизия схемы БД {revision}")
+    return True
+
+
+def create_health_router(broker, engine: AsyncEngine) -> APIRouter:
+    router = APIRouter()
+
+    @router.get("/healthz")
+    async def healthz():
+        # Liveness: процесс жив и обслуживает цикл событий
+        return {"status": "ok"}
+
+    @router.get("/readyz")
+    async def readyz(response: Response):
+        # Readiness: нужна БД со схемой нужной ревизии; недоступный брокер - только degraded
+        checks = {"broker": broker.status()}
+        try:
+            revision = await asyncio.wait_for(current_schema_revision(engine), HEALTH_DB_TIMEOUT)
+        except Exception as e:
+            checks["database"] = {"status": "unavailable", "error": str(e)}
+            response.status_code = 503
+            return {"status": "unavailable", "checks": checks}
+
+        schema_ok = revision == expected_revision()
+        checks["database"] = {
+            "status": "ok" if schema_ok else "schema_mismatch",
+            "revision": revision,
+            "expected_revision": expected_revision(),
+        }
+        if not schema_ok:
+            response.status_code = 503
+            return {"status": "unavailable", "checks": checks}
+
+        return {"status": "ok" if broker.ready else "degraded", "checks": checks}
+
+    return router
@@ -0,0 +1,170 @@
+"""Метрики Prometheus сервиса и endpoint /metrics.
+
+Метки только с ограниченным набором значений: шаблон маршрута (а не
+фактический путь), класс статуса, тип SQL-операции, routing key.
+Сервис запускается одним процессом uvicorn, поэтому хватает обычного
+реестра без multiprocess-режима. Реестр свой у модуля, а не глобальный:
+так несколько сервисов можно загрузить в один процесс (benchmarks/loadtest.py).
+"""
+from fastapi import APIRouter, Response
+from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Gauge, Histogram, ProcessCollector,
+                               generate_latest)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from common.sqltiming import add_query_observer, instrument_engine as instrument_engine_timing
+import time
+
+# Запросы к БД обычно быстрее HTTP-запросов, поэтому мельче шаг
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SQL_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+
+registry = CollectorRegistry()
+ProcessCollector(registry=registry)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Время обработки HTTP-запроса",
+    ["method", "route", "status"], registry=registry,
+)
+REQUESTS_IN_PROGRESS = Gauge("http_requests_in_progress", "HTTP-запросы в обработке", registry=registry)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "Время выполнения SQL-выражения",
+    ["operation"], buckets=FAST_BUCKETS, registry=registry,
+)
+BROKER_PUBLISH_DURATION = Histogram(
+    "broker_publish_duration_seconds", "Время публикации сообщения в RabbitMQ",
+    ["routing_key"], buckets=FAST_BUCKETS, registry=registry,
+)
+HASH_QUEUE_DURATION = Histogram(
+    "password_hash_queue_seconds", "Ожидание свободного места в пуле хеширования паролей",
+    buckets=FAST_BUCKETS, registry=registry,
+)
+HASH_DURATION = Histogram("password_hash_duration_seconds", "Время хеширования пароля в пуле", registry=registry)
+HASH_POOL_QUEUED = Gauge("password_hash_queued", "Хеширования, ждущие места в пуле", registry=registry)
+HASH_POOL_RUNNING = Gauge("password_hash_running", "Хеширования, выполняемые в пуле", registry=registry)
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: длительность и число одновременных запросов.
+
+    Чистый ASGI, а не BaseHTTPMiddleware, чтобы не буферизовать потоковые ответы.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_PROGRESS.dec()
+            # Маршрут проставляет роутер FastAPI; без него (404) - одна общая метка
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_DURATION.labels(scope["method"], route, f"{status['code'] // 100}xx").observe(
+                time.perf_counter() - start
+            )
+
+
+class PoolCollector:
+    """Состояние пула соединений SQLAlchemy, читается в момент сбора метрик."""
+
+    def __init__(self, pool_statistics):
+        self.pool_statistics = pool_statistics
+
+    def collect(self):
+        stats = self.pool_statistics()
+        connections = GaugeMetricFamily("db_pool_connections", "Соединения пула по состоянию", labels=["state"])
+        connections.add_metric(["checked_out"], stats["checked_out"])
+        connections.add_metric(["checked_in"], stats["checked_in"])
+        connections.add_metric(["overflow"], max(stats["overflow"], 0))
+        yield connections
+        yield GaugeMetricFamily("db_pool_size", "Постоянный размер пула", value=stats["size"])
+        yield GaugeMetricFamily("db_pool_max_overflow", "Допустимое превышение пула", value=stats["max_overflow"])
+        yield CounterMetricFamily("db_pool_checkouts", "Выдачи соединений из пула", value=stats["checkouts"])
+        yield CounterMetricFamily("db_pool_timeouts", "Таймауты ожидания соединения", value=stats["timeouts"])
+        yield CounterMetricFamily("db_pool_wait_seconds", "Суммарное ожидание соединения",
+                                  value=stats["wait_seconds_total"])
+
+
+class CacheCollector:
+    """Состояние in-process кэшей TTLCache, по метке cache на каждый кэш."""
+
+    def __init__(self):
+        self.caches = {}
+
+    def collect(self):
+        entries = GaugeMetricFamily("cache_entries", "Записей в кэше", labels=["cache"])
+        capacity = GaugeMetricFamily("cache_max_entries", "Предельный размер кэша", labels=["cache"])
+        hits = CounterMetricFamily("cache_hits", "Попадания в кэш", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "Промахи кэша", labels=["cache"])
+        evictions = CounterMetricFamily("cache_evictions", "Вытеснения из кэша по размеру", labels=["cache"])
+        for name, cache in self.caches.items():
+            stats = cache.stats()
+            entries.add_metric([name], stats["size"])
+            capacity.add_metric([name], stats["maxsize"])
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+            evictions.add_metric([name], stats["evictions"])
+        yield entries
+        yield capacity
+        yield hits
+        yield misses
+        yield evictions
+
+
+_cache_collector = CacheCollector()
+registry.register(_cache_collector)
+
+
+def register_cache(name: str, cache):
+    _cache_collector.caches[name] = cache
+
+
+def _operation(statement: str) -> str:
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return keyword if keyword in SQL_OPERATIONS else "OTHER"
+
+
+def _observe_query(conn, statement, parameters, context, elapsed):
+    DB_QUERY_DURATION.labels(_operation(statement)).observe(elapsed)
+
+
+def instrument_engine(engine, pool_statistics):
+    instrument_engine_timing(engine)
+    add_query_observer(_observe_query)
+    registry.register(PoolCollector(pool_statistics))
+
+
+def instrument_app(app, engine, pool_statistics):
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(create_metrics_router())
+    instrument_engine(engine, pool_statistics)
+
+
+async def timed_publish(exchange, message, routing_key: str):
+    start = time.perf_counter()
+    try:
+        return await exchange.publish(message, routing_key=routing_key)
+    finally:
+        BROKER_PUBLISH_DURATION.labels(routing_key).observe(time.perf_counter() - start)
+
+
+def create_metrics_router() -> APIRouter:
+    router = APIRouter()
+
+    @router.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+    return router
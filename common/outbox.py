@@ -0,0 +1,119 @@
+"""Transactional outbox: события пишутся в таблицу вместе с изменением данных
+и публикуются в RabbitMQ фоновым ретранслятором.
+
+Модель таблицы outbox_events и фабрика сессий у каждого сервиса свои,
+поэтому передаются параметрами.
+"""
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import BigInteger, any_, delete, literal
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.future import select
+from common.events import CONTENT_TYPE, Event
+from common.metrics import timed_publish
+import aio_pika
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "200"))
+# Как часто проверять outbox, если обработчики не будили ретранслятор (секунды)
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "1"))
+
+
+def add_event(session: AsyncSession, model, event: Event):
+    # Событие попадёт в БД тем же commit, что и изменение данных
+    session.add(model(routing_key=event.routing_key, body=event.encode(), created_at=datetime.utcnow()))
+
+
+class OutboxRelay:
+    """Фоновая публикация событий из outbox_events в RabbitMQ.
+
+    Пачка строк блокируется FOR UPDATE SKIP LOCKED (воркеры не мешают друг
+    другу), публикуется в канал с подтверждениями издателя и удаляется в той же
+    транзакции только после подтверждения всех сообщений. Доставка - at least once.
+    """
+
+    def __init__(self, broker, session_factory: async_sessionmaker, model,
+                 batch_size: int = OUTBOX_BATCH_SIZE, poll_interval: float = OUTBOX_POLL_INTERVAL):
+        self.broker = broker
+        self.session_factory = session_factory
+        self.model = model
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.published = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def notify(self):
+        self._wakeup.set()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            published = 0
+            try:
+                published = await self.publish_batch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка при публикации событий из outbox: {e}")
+
+            # Полная пачка - в outbox, скорее всего, есть ещё события
+            if published < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+    async def publish_batch(self) -> int:
+        if not self.broker.ready:
+            return 0
+        exchange = self.broker.exchange
+        model = self.model
+
+        async with self.session_factory() as session:
+            async with session.begin():
+                result = await session.execute(
+                    select(model)
+                    .order_by(model.id)
+                    .limit(self.batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+                events = result.scalars().all()
+                if not events:
+                    return 0
+
+                # Публикуем пачку без ожидания каждого подтверждения по отдельности
+                await asyncio.gather(*(
+                    timed_publish(
+                        exchange,
+                        aio_pika.Message(
+                            body=event.body,
+                            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                            content_type=CONTENT_TYPE,
+                            type=event.routing_key,
+                        ),
+                        event.routing_key,
+                    )
+                    for event in events
+                ))
+
+                ids = [event.id for event in events]
+                await session.execute(delete(model).where(model.id == any_(literal(ids, ARRAY(BigInteger)))))
+
+        self.published += len(events)
+        logger.info(f"Из outbox опубликовано событий: {len(events)}")
+        return len(events)
@@ -0,0 +1,236 @@
+"""Диагностика медленных запросов.
+
+- Журнал медленных SQL: выражения дольше SLOW_QUERY_MS пишутся в лог,
+  для читающих SELECT и WITH по желанию (SLOW_QUERY_EXPLAIN) с планом EXPLAIN (ANALYZE, BUFFERS).
+- Счётчик SQL на HTTP-запрос: заголовки X-DB-Query-Count и X-DB-Query-Time-Ms,
+  предупреждение в лог при QUERY_COUNT_WARN и больше (признак N+1).
+- Профилирование запроса: администратор добавляет заголовок X-Profile: 1,
+  вместо ответа приходят стеки в folded-формате (flamegraph.pl, speedscope).
+"""
+from contextvars import ContextVar
+from typing import Dict, Optional
+from fastapi import HTTPException
+from common.sqltiming import add_query_observer, instrument_engine
+from common.tokens import decode_token
+import collections
+import logging
+import os
+import re
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Порог медленного выражения в миллисекундах, 0 - журнал выключен
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+# EXPLAIN ANALYZE выполняет запрос повторно, поэтому только по явному включению
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "false").lower() == "true"
+# Одно и то же выражение объясняется не чаще раза в указанное число секунд
+SLOW_QUERY_EXPLAIN_COOLDOWN = float(os.getenv("SLOW_QUERY_EXPLAIN_COOLDOWN", "60"))
+SLOW_QUERY_LOG_CHARS = 2000
+
+QUERY_COUNT_WARN = int(os.getenv("QUERY_COUNT_WARN", "50"))
+
+PROFILE_HEADER = "x-profile"
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "30"))
+# Отметка для выборок, когда цикл событий занят не этим запросом (ожидание I/O или другие запросы)
+PROFILE_WAITING = "[waiting]"
+
+_request_queries: ContextVar[Optional[dict]] = ContextVar("request_queries", default=None)
+_explained_at: Dict[str, float] = {}
+
+_DATA_MODIFYING = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE|SHARE)\b", re.IGNORECASE)
+
+
+def _explain(conn, statement: str, parameters) -> str:
+    # Отдельный курсор DBAPI: события SQLAlchemy не срабатывают, результат исходного запроса не трогаем.
+    # SAVEPOINT: ошибка EXPLAIN (например, statement_timeout на повторе медленного запроса)
+    # откатывается до точки сохранения и не прерывает транзакцию самого запроса
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        except Exception:
+            cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            raise
+        cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        return plan
+    finally:
+        cursor.close()
+
+
+def _should_explain(statement: str, context) -> bool:
+    if not SLOW_QUERY_EXPLAIN:
+        return False
+    words = statement.split(None, 1)
+    if not words or words[0].upper() not in ("SELECT", "WITH"):
+        return False
+    # EXPLAIN ANALYZE выполняет выражение: WITH ... INSERT/UPDATE/DELETE изменил бы данные повторно,
+    # SELECT ... FOR UPDATE/SHARE снова взял бы блокировки
+    if _DATA_MODIFYING.search(statement):
+        return False
+    # Серверный курсор ещё открыт, второй запрос в этом соединении сейчас нельзя
+    if context is not None and context.execution_options.get("stream_results"):
+        return False
+    now = time.monotonic()
+    if now - _explained_at.get(statement, -SLOW_QUERY_EXPLAIN_COOLDOWN) < SLOW_QUERY_EXPLAIN_COOLDOWN:
+        return False
+    _explained_at[statement] = now
+    return True
+
+
+def _observe_query(conn, statement, parameters, context, elapsed):
+    queries = _request_queries.get()
+    if queries is not None:
+        queries["count"] += 1
+        queries["seconds"] += elapsed
+
+    if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+        message = f"Медленный запрос {elapsed * 1000:.1f} мс: {statement[:SLOW_QUERY_LOG_CHARS]}"
+        if _should_explain(statement, context):
+            try:
+                message += "\n" + _explain(conn, statement, parameters)
+            except Exception as e:
+                message += f"\nEXPLAIN не выполнен: {e}"
+        logger.warning(message)
+
+
+class StackSampler:
+    """Выборки стека потока цикла событий с отбором по корневому кадру запроса.
+
+    Стек учитывается, только если в нём есть кадр middleware этого запроса,
+    то есть цикл событий в этот момент выполнял именно его. Остальные выборки
+    идут в PROFILE_WAITING.
+    """
+
+    def __init__(self, thread_id: int, root_frame, interval: float = PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.root_frame = root_frame
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def _sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        stack = []
+        while frame is not None and frame is not self.root_frame:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        if frame is None:
+            self.stacks[PROFILE_WAITING] += 1
+        elif stack:
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def _run(self):
+        deadline = time.monotonic() + PROFILE_MAX_SECONDS
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            self._sample()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+async def _is_admin(headers: dict, revocation_list) -> bool:
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        payload = decode_token(token)
+    except HTTPException:
+        return False
+    if payload.get("role") != "admin":
+        return False
+    # Токен администратора после /logout/ профилировать уже не даёт
+    return not await revocation_list.is_token_revoked(token, payload)
+
+
+class ProfilingMiddleware:
+    """Счётчик SQL на запрос и профилирование по заголовку X-Profile."""
+
+    def __init__(self, app, revocation_list):
+        self.app = app
+        self.revocation_list = revocation_list
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        if headers.get(PROFILE_HEADER.encode()) == b"1" and await _is_admin(headers, self.revocation_list):
+            await self._profile(scope, receive, send)
+            return
+
+        queries = {"count": 0, "seconds": 0.0}
+        token = _request_queries.set(queries)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-db-query-count", str(queries["count"]).encode()),
+                    (b"x-db-query-time-ms", f"{queries['seconds'] * 1000:.1f}".encode()),
+                ]
+                if queries["count"] >= QUERY_COUNT_WARN:
+                    logger.warning(f"{scope['method']} {scope['path']}: {queries['count']} SQL-запросов, возможен N+1")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_queries.reset(token)
+
+    async def _profile(self, scope, receive, send):
+        status = {"code": 500}
+
+        async def discard(message):
+            # Ответ обработчика не отправляется: вместо него уходит профиль
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+
+        queries = {"count": 0, "seconds": 0.0}
+        token = _request_queries.set(queries)
+        sampler = StackSampler(threading.get_ident(), sys._getframe())
+        sampler.start()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            sampler.stop()
+            _request_queries.reset(token)
+        elapsed = time.perf_counter() - started
+
+        body = sampler.folded().encode()
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/plain; charset=utf-8"),
+                (b"content-length", str(len(body)).encode()),
+                (b"x-profile-original-status", str(status["code"]).encode()),
+                (b"x-profile-duration-ms", f"{elapsed * 1000:.1f}".encode()),
+                (b"x-profile-interval-ms", f"{PROFILE_INTERVAL * 1000:g}".encode()),
+                (b"x-db-query-count", str(queries["count"]).encode()),
+                (b"x-db-query-time-ms", f"{queries['seconds'] * 1000:.1f}".encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def instrument_profiling(app, engine, revocation_list):
+    instrument_engine(engine)
+    add_query_observer(_observe_query)
+    app.add_middleware(ProfilingMiddleware, revocation_list=revocation_list)
@@ -0,0 +1,213 @@
+"""Список отозванных токенов, общий для сервисов.
+
+user_service отзывает токен при /logout/, task_service и admin_service
+проверяют его при каждом запросе. Видеть отзывы друг друга сервисы могут
+только через общее хранилище: REVOCATION_BACKEND=postgres или redis.
+
+Отзыв действует сразу только в том процессе, который его выполнил. Остальные
+воркеры проверяют токены по локальному Bloom-фильтру и узнают об отзыве при
+следующей синхронизации, то есть с задержкой до REVOCATION_SYNC_INTERVAL
+(по умолчанию 2 секунды).
+"""
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.future import select
+import asyncio
+import hashlib
+import heapq
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# memory - только текущий процесс, postgres/redis - общий список для всех воркеров
+REVOCATION_BACKEND = os.getenv("REVOCATION_BACKEND", "memory")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Как часто локальный фильтр перечитывает общий список отозванных токенов (секунды)
+REVOCATION_SYNC_INTERVAL = float(os.getenv("REVOCATION_SYNC_INTERVAL", "2"))
+REVOCATION_BLOOM_BITS = int(os.getenv("REVOCATION_BLOOM_BITS", str(1 << 20)))
+REVOCATION_BLOOM_HASHES = 7
+
+
+def token_key(token: str, payload: dict) -> str:
+    jti = payload.get("jti")
+    if jti:
+        return jti
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def token_expires_at(payload: dict) -> float:
+    return float(payload.get("exp") or 0)
+
+
+class BloomFilter:
+    def __init__(self, size_bits: int = REVOCATION_BLOOM_BITS, hashes: int = REVOCATION_BLOOM_HASHES):
+        self.size_bits = size_bits
+        self.hashes = hashes
+        self.bits = bytearray((size_bits + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size_bits
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class MemoryRevocationStore:
+    def __init__(self):
+        self.revoked: Dict[str, float] = {}
+        self._expiry_heap = []
+
+    async def add(self, key: str, expires_at: float):
+        self.revoked[key] = expires_at
+        heapq.heappush(self._expiry_heap, (expires_at, key))
+
+    async def contains(self, key: str) -> bool:
+        expires_at = self.revoked.get(key)
+        return expires_at is not None and expires_at > time.time()
+
+    async def active_keys(self) -> Iterable[str]:
+        return list(self.revoked)
+
+    async def purge_expired(self):
+        now = time.time()
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expiry_heap)
+            if self.revoked.get(key) == expires_at:
+                del self.revoked[key]
+
+
+class PostgresRevocationStore:
+    def __init__(self, session_factory: async_sessionmaker, model):
+        # model - RevokedToken из models.py сервиса (jti, expires_at)
+        self.session_factory = session_factory
+        self.model = model
+
+    async def add(self, key: str, expires_at: float):
+        async with self.session_factory() as session:
+            await session.execute(
+                insert(self.model)
+                .values(jti=key, expires_at=datetime.utcfromtimestamp(expires_at))
+                .on_conflict_do_nothing(index_elements=["jti"])
+            )
+            await session.commit()
+
+    async def contains(self, key: str) -> bool:
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(self.model.jti).where(self.model.jti == key, self.model.expires_at > datetime.utcnow())
+            )
+            return result.first() is not None
+
+    async def active_keys(self) -> Iterable[str]:
+        async with self.session_factory() as session:
+            result = await session.execute(select(self.model.jti).where(self.model.expires_at > datetime.utcnow()))
+            return result.scalars().all()
+
+    async def purge_expired(self):
+        async with self.session_factory() as session:
+            await session.execute(delete(self.model).where(self.model.expires_at <= datetime.utcnow()))
+            await session.commit()
+
+
+class RedisRevocationStore:
+    prefix = "revoked:"
+
+    def __init__(self, url: str = REDIS_URL):
+        import redis.asyncio as aioredis
+
+        self.redis = aioredis.from_url(url)
+
+    async def add(self, key: str, expires_at: float):
+        # Redis сам удалит ключ в момент истечения токена
+        await self.redis.set(self.prefix + key, 1, exat=max(int(expires_at), int(time.time()) + 1))
+
+    async def contains(self, key: str) -> bool:
+        return bool(await self.redis.exists(self.prefix + key))
+
+    async def active_keys(self) -> Iterable[str]:
+        return [key.decode()[len(self.prefix):] async for key in self.redis.scan_iter(match=self.prefix + "*")]
+
+    async def purge_expired(self):
+        pass
+
+
+class RevocationList:
+    """Список отозванных токенов с локальным Bloom-фильтром.
+
+    Проверка "токен не отозван" обычно решается фильтром внутри процесса;
+    в общее хранилище идём только при срабатывании фильтра. Отзывы с других
+    воркеров попадают в фильтр при синхронизации раз в REVOCATION_SYNC_INTERVAL.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.bloom = BloomFilter()
+        # Отозванные в этом процессе ключи, чтобы их не потеряла параллельная пересборка фильтра
+        self._local: Dict[str, float] = {}
+        self._sync_task: Optional[asyncio.Task] = None
+
+    async def revoke(self, key: str, expires_at: float):
+        if expires_at <= time.time():
+            return
+        self._local[key] = expires_at
+        self.bloom.add(key)
+        await self.store.add(key, expires_at)
+
+    async def is_revoked(self, key: str) -> bool:
+        if key not in self.bloom:
+            return False
+        return await self.store.contains(key)
+
+    async def is_token_revoked(self, token: str, payload: dict) -> bool:
+        return await self.is_revoked(token_key(token, payload))
+
+    async def sync(self):
+        await self.store.purge_expired()
+        bloom = BloomFilter()
+        for key in await self.store.active_keys():
+            bloom.add(key)
+        now = time.time()
+        self._local = {key: exp for key, exp in self._local.items() if exp > now}
+        for key in self._local:
+            bloom.add(key)
+        self.bloom = bloom
+
+    async def _sync_loop(self, interval: float):
+        while True:
+            try:
+                await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка синхронизации списка отозванных токенов: {e}")
+            await asyncio.sleep(interval)
+
+    def start(self, interval: float = REVOCATION_SYNC_INTERVAL):
+        if self._sync_task is None:
+            self._sync_task = asyncio.create_task(self._sync_loop(interval))
+
+    async def stop(self):
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            self._sync_task = None
+
+
+def create_revocation_list(session_factory: async_sessionmaker, model) -> RevocationList:
+    if REVOCATION_BACKEND == "postgres":
+        return RevocationList(PostgresRevocationStore(session_factory, model))
+    if REVOCATION_BACKEND == "redis":
+        return RevocationList(RedisRevocationStore())
+    return RevocationList(MemoryRevocationStore())
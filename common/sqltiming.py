@@ -0,0 +1,44 @@
+"""Замер времени SQL-выражений одним набором обработчиков событий движка.
+
+Метрики и диагностика не вешают свои before/after_cursor_execute, а
+получают уже посчитанное время через add_query_observer.
+"""
+from typing import Any, Callable, List
+from sqlalchemy import event
+import time
+
+# observer(conn, statement, parameters, context, elapsed_seconds)
+QueryObserver = Callable[[Any, str, Any, Any, float], None]
+
+_observers: List[QueryObserver] = []
+
+
+def add_query_observer(observer: QueryObserver):
+    if observer not in _observers:
+        _observers.append(observer)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    for observer in _observers:
+        observer(conn, statement, parameters, context, elapsed)
+
+
+def _handle_error(exception_context):
+    # Выражение упало: after_cursor_execute не вызовется, снимаем отметку сами
+    starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(engine):
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
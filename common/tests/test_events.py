@@ -0,0 +1,42 @@
+import pytest
+
+from common.events import EVENT_VERSION, Event, EventType, _ENVELOPE
+
+
+def test_round_trip():
+    event = Event(EventType.TASK_CREATED, user_id=12, task_id=345, timestamp=1700000000.123,
+                  trace_id="0123456789abcdef0123456789abcdef")
+    body = event.encode()
+    assert len(body) == _ENVELOPE.size == 42
+    assert Event.decode(body) == event
+    assert Event.decode(body).routing_key == "task.created"
+
+
+def test_round_trip_without_task():
+    event = Event(EventType.USER_REGISTERED, user_id=7, timestamp=1700000000.5)
+    decoded = Event.decode(event.encode())
+    assert decoded.task_id is None
+    assert decoded == event
+
+
+def test_wire_format_is_pinned():
+    event = Event(EventType.USER_LOGGED_IN, user_id=1, task_id=2, timestamp=3.004, trace_id="ff" * 16)
+    assert event.encode() == (
+        bytes([EVENT_VERSION, int(EventType.USER_LOGGED_IN)])
+        + (1).to_bytes(8, "big") + (2).to_bytes(8, "big") + (3004).to_bytes(8, "big")
+        + b"\xff" * 16
+    )
+
+
+def test_unknown_version_is_rejected():
+    body = bytearray(Event(EventType.TASK_CREATED, user_id=1, task_id=2).encode())
+    body[0] = EVENT_VERSION + 1
+    with pytest.raises(ValueError, match="версия"):
+        Event.decode(bytes(body))
+
+
+@pytest.mark.parametrize("length", [0, 1, 41])
+def test_truncated_body_is_rejected(length):
+    body = Event(EventType.TASK_CREATED, user_id=1, task_id=2).encode()
+    with pytest.raises(ValueError, match="короче"):
+        Event.decode(body[:length])
@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+from common import revocation
+from common.revocation import BloomFilter, MemoryRevocationStore, RevocationList, token_key
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_bloom_filter_contains_added_keys():
+    bloom = BloomFilter(size_bits=1 << 12)
+    keys = [f"jti-{index}" for index in range(50)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    assert "never-added" not in bloom
+
+
+def test_revoked_key_is_revoked_immediately_on_revoking_worker():
+    revocation_list = RevocationList(MemoryRevocationStore())
+    _run(revocation_list.revoke("jti-1", time.time() + 60))
+    assert _run(revocation_list.is_revoked("jti-1"))
+    assert not _run(revocation_list.is_revoked("jti-2"))
+
+
+def test_token_key_prefers_jti():
+    revocation_list = RevocationList(MemoryRevocationStore())
+    _run(revocation_list.revoke(token_key("token", {"jti": "abc"}), time.time() + 60))
+    assert _run(revocation_list.is_token_revoked("other-token", {"jti": "abc"}))
+    assert not _run(revocation_list.is_token_revoked("token", {}))
+
+
+def test_already_expired_token_is_not_stored():
+    store = MemoryRevocationStore()
+    _run(RevocationList(store).revoke("jti-1", time.time() - 1))
+    assert store.revoked == {}
+
+
+def test_other_worker_sees_revocation_after_sync():
+    store = MemoryRevocationStore()
+    revoking, other = RevocationList(store), RevocationList(store)
+    _run(revoking.revoke("jti-1", time.time() + 60))
+    # До синхронизации у другого воркера фильтр пуст и отзыв ещё не виден
+    assert not _run(other.is_revoked("jti-1"))
+    _run(other.sync())
+    assert _run(other.is_revoked("jti-1"))
+
+
+def test_purge_expired_removes_only_expired_entries():
+    store = MemoryRevocationStore()
+    now = time.time()
+    _run(store.add("expired", now - 1))
+    _run(store.add("active", now + 60))
+    # Ключ отозван повторно с более поздним сроком: старая запись в куче его не удаляет
+    _run(store.add("extended", now - 1))
+    _run(store.add("extended", now + 60))
+    _run(store.purge_expired())
+    assert set(store.revoked) == {"active", "extended"}
+    assert not _run(store.contains("expired"))
+
+
+def test_sync_drops_expired_keys_from_filter(monkeypatch):
+    store = MemoryRevocationStore()
+    revocation_list = RevocationList(store)
+    now = time.time()
+    _run(revocation_list.revoke("jti-1", now + 60))
+    monkeypatch.setattr(revocation.time, "time", lambda: now + 120)
+    _run(revocation_list.sync())
+    assert store.revoked == {}
+    assert "jti-1" not in revocation_list.bloom
+    assert not _run(revocation_list.is_revoked("jti-1"))
+
+
+def test_bloom_hit_with_store_miss_is_not_revoked():
+    store = MemoryRevocationStore()
+    revocation_list = RevocationList(store)
+    # Ложное срабатывание фильтра: ключ есть в фильтре, но не в хранилище
+    revocation_list.bloom.add("jti-1")
+    assert "jti-1" in revocation_list.bloom
+    assert not _run(revocation_list.is_revoked("jti-1"))
+
+
+def test_bloom_miss_skips_store():
+    class Store(MemoryRevocationStore):
+        async def contains(self, key):
+            raise AssertionError("без срабатывания фильтра хранилище не опрашивается")
+
+    assert not _run(RevocationList(Store()).is_revoked("jti-1"))
@@ -0,0 +1,26 @@
+"""Ключ и проверка JWT.
+
+Токены выпускает user_service, task_service и admin_service проверяют их
+локально по подписи, поэтому ключ и алгоритм должны совпадать во всех сервисах.
+"""
+from fastapi import HTTPException, status
+from jose import JWTError, jwt
+import os
+
+SECRET_KEY = os.getenv("SECRET_KEY", "secret-key")
+ALGORITHM = "HS256"
+
+
+def decode_token(token: str) -> dict:
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise credentials_exception
+    if payload.get("sub") is None or payload.get("user_id") is None:
+        raise credentials_exception
+    return payload
@@ -0,0 +1,12 @@
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from common.database import create_engine_from_env
+
+SERVICE_NAME = "event_consumer"
+
+# Создаем асинхронный движок
+engine = create_engine_from_env(SERVICE_NAME)
+
+# Создаем асинхронную сессию
+async_session = async_sessionmaker(
+    bind=engine, expire_on_commit=False
+)
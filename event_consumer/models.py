@@ -0,0 +1,101 @@
+from sqlalchemy.orm import declarative_base, deferred
+from sqlalchemy import (Column, Integer, BigInteger, String, Text, ForeignKey, DateTime, Boolean, Index, LargeBinary,
+                        Computed, Float, text)
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+
+Base = declarative_base()
+
+
+class User(Base):
+    __tablename__ = "users"
+
+    id = Column(Integer, primary_key=True)
+    username = Column(String(255), unique=True, nullable=False)
+    password = Column(String(255), nullable=False)
+    email = Column(String(255), unique=True, nullable=False)
+    role = Column(String(255), nullable=False)
+
+
+class Task(Base):
+    __tablename__ = "tasks"
+    id = Column(Integer, primary_key=True)
+    name = Column(String(255), unique=True, nullable=False)
+    description = Column(Text, nullable=False)
+    startime = Column(DateTime, nullable=False)
+    finishtime = Column(DateTime, nullable=False)
+    checked = Column(Boolean, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Номер версии строки, отдаётся клиенту как ETag для If-Match
+    version = Column(Integer, nullable=False, server_default="1")
+    # Поисковый вектор считает Postgres; deferred - чтобы не тянуть его в каждый SELECT задач
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(description, '')), 'B')",
+        persisted=True,
+    )))
+
+    __table_args__ = (
+        # Постраничная выдача задач пользователя: WHERE user_id = ? ORDER BY startime, id
+        Index("ix_tasks_user_id_startime_id", "user_id", "startime", "id"),
+        # Полнотекстовый поиск и нечёткое совпадение имени (pg_trgm)
+        Index("ix_tasks_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_tasks_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        # Пересечение периода задачи с окном (btree_gist); схема не запрещает startime > finishtime
+        Index("ix_tasks_user_id_period", "user_id",
+              text("tsrange(LEAST(startime, finishtime), GREATEST(startime, finishtime), '[]')"),
+              postgresql_using="gist"),
+        # Просроченные и ближайшие невыполненные задачи
+        Index("ix_tasks_open_user_id_finishtime", "user_id", "finishtime", "id", postgresql_where=text("NOT checked")),
+        Index("ix_tasks_open_user_id_startime", "user_id", "startime", "id", postgresql_where=text("NOT checked")),
+    )
+
+
+class ServerStatus(Base):
+    __tablename__ = "server_status"
+    id = Column(Integer, primary_key=True)
+    users_n = Column(Integer, nullable=False)
+    task_n = Column(Integer, nullable=False)
+    awr_task_n = Column(Integer, nullable=False)
+    date = Column(DateTime, nullable=False, index=True)
+
+
+class TaskDistribution(Base):
+    # Снимок распределения задач по пользователям, сохраняется рядом с ServerStatus
+    __tablename__ = "task_distribution"
+    id = Column(Integer, primary_key=True)
+    users_n = Column(Integer, nullable=False)
+    task_n = Column(Integer, nullable=False)
+    done_n = Column(Integer, nullable=False)
+    p50 = Column(Float, nullable=False)
+    p90 = Column(Float, nullable=False)
+    p99 = Column(Float, nullable=False)
+    max = Column(Integer, nullable=False)
+    completion_ratio = Column(Float, nullable=False)
+    top_users = Column(JSONB, nullable=False)
+    date = Column(DateTime, nullable=False, index=True)
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+    jti = Column(String(64), primary_key=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class OutboxEvent(Base):
+    # Событие для RabbitMQ, записывается в одной транзакции с изменением данных
+    __tablename__ = "outbox_events"
+    id = Column(BigInteger, primary_key=True)
+    routing_key = Column(String(255), nullable=False)
+    body = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+
+class UserEventCounter(Base):
+    # Счётчики событий пользователя, ведёт event_consumer
+    __tablename__ = "user_event_counters"
+    user_id = Column(Integer, primary_key=True)
+    registered = Column(Integer, nullable=False, server_default="0")
+    logins = Column(Integer, nullable=False, server_default="0")
+    logouts = Column(Integer, nullable=False, server_default="0")
+    tasks_created = Column(Integer, nullable=False, server_default="0")
+    updated_at = Column(DateTime, nullable=False)
@@ -0,0 +1,27 @@
+"""Add tasks (user_id, startime, id) index
+
+Revision ID: 3b7e91c4d2a8
+Revises: e003ce86499f
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7e91c4d2a8'
+down_revision: Union[str, None] = 'e003ce86499f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Индекс под постраничную выдачу задач пользователя (keyset по startime, id).
+    # Фильтры по checked и диапазону дат применяются поверх этого же индекса.
+    op.create_index('ix_tasks_user_id_startime_id', 'tasks', ['user_id', 'startime', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_user_id_startime_id', table_name='tasks')
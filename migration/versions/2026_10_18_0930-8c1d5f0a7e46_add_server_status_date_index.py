@@ -0,0 +1,26 @@
+"""Add server_status date index
+
+Revision ID: 8c1d5f0a7e46
+Revises: 3b7e91c4d2a8
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '8c1d5f0a7e46'
+down_revision: Union[str, None] = '3b7e91c4d2a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Выборка временного ряда снимков по диапазону дат
+    op.create_index('ix_server_status_date', 'server_status', ['date'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_server_status_date', table_name='server_status')
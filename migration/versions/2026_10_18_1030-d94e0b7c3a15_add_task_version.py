@@ -0,0 +1,26 @@
+"""Add task version
+
+Revision ID: d94e0b7c3a15
+Revises: 5f2a6d83b1c9
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd94e0b7c3a15'
+down_revision: Union[str, None] = '5f2a6d83b1c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Версия строки для оптимистичной блокировки (ETag / If-Match)
+    op.add_column('tasks', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade() -> None:
+    op.drop_column('tasks', 'version')
@@ -0,0 +1,34 @@
+"""Add user_event_counters
+
+Revision ID: b2f7d4e6c081
+Revises: a6c3e8f19d27
+Create Date: 2026-10-18 11:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2f7d4e6c081'
+down_revision: Union[str, None] = 'a6c3e8f19d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Счётчики, которые event_consumer обновляет пачками из очереди событий
+    op.create_table('user_event_counters',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('registered', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('logins', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('logouts', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('tasks_created', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_event_counters')
@@ -0,0 +1,38 @@
+"""Add task period indexes
+
+Revision ID: e4b9a07c1f63
+Revises: c71e5a9b2d40
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b9a07c1f63'
+down_revision: Union[str, None] = 'c71e5a9b2d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # btree_gist нужен, чтобы положить user_id в один GiST-индекс с диапазоном
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    # Период задачи как tsrange; LEAST/GREATEST - схема не запрещает startime > finishtime
+    op.create_index('ix_tasks_user_id_period', 'tasks', [
+        sa.text('user_id'),
+        sa.text("tsrange(LEAST(startime, finishtime), GREATEST(startime, finishtime), '[]')"),
+    ], unique=False, postgresql_using='gist')
+    # Частичные индексы по невыполненным задачам: просроченные и ближайшие
+    op.create_index('ix_tasks_open_user_id_finishtime', 'tasks', ['user_id', 'finishtime', 'id'], unique=False,
+                    postgresql_where=sa.text('NOT checked'))
+    op.create_index('ix_tasks_open_user_id_startime', 'tasks', ['user_id', 'startime', 'id'], unique=False,
+                    postgresql_where=sa.text('NOT checked'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_open_user_id_startime', table_name='tasks')
+    op.drop_index('ix_tasks_open_user_id_finishtime', table_name='tasks')
+    op.drop_index('ix_tasks_user_id_period', table_name='tasks')
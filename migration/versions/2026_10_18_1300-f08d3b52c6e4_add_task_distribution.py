@@ -0,0 +1,42 @@
+"""Add task_distribution
+
+Revision ID: f08d3b52c6e4
+Revises: e4b9a07c1f63
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'f08d3b52c6e4'
+down_revision: Union[str, None] = 'e4b9a07c1f63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Снимки распределения задач по пользователям (перцентили, самые нагруженные)
+    op.create_table('task_distribution',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('users_n', sa.Integer(), nullable=False),
+    sa.Column('task_n', sa.Integer(), nullable=False),
+    sa.Column('done_n', sa.Integer(), nullable=False),
+    sa.Column('p50', sa.Float(), nullable=False),
+    sa.Column('p90', sa.Float(), nullable=False),
+    sa.Column('p99', sa.Float(), nullable=False),
+    sa.Column('max', sa.Integer(), nullable=False),
+    sa.Column('completion_ratio', sa.Float(), nullable=False),
+    sa.Column('top_users', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('date', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_task_distribution_date', 'task_distribution', ['date'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_task_distribution_date', table_name='task_distribution')
+    op.drop_table('task_distribution')
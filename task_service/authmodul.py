@@ -0,0 +1,24 @@
+from fastapi import Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+from models import RevokedToken
+from database import async_session
+from common.revocation import create_revocation_list
+from common.tokens import decode_token
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login/")
+
+# Токены, отозванные через /logout/ в user_service (нужен общий REVOCATION_BACKEND)
+revocation_list = create_revocation_list(async_session, RevokedToken)
+
+
+async def get_current_user_id(token: str = Depends(oauth2_scheme)) -> int:
+    # Пользователь определяется по подписи токена, без обращения к RabbitMQ;
+    # отзыв проверяет локальный Bloom-фильтр, в БД идём только при его срабатывании
+    payload = decode_token(token)
+    if await revocation_list.is_token_revoked(token, payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return int(payload["user_id"])
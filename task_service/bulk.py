@@ -0,0 +1,123 @@
+from sqlalchemy import Integer, String, Text, DateTime, Boolean, any_, cast, column, delete, func, literal, update, values
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from models import Task
+from schemas import TaskCreate, TaskUpdateItem
+
+# Строк в одном INSERT/UPDATE: 6 параметров на строку, лимит Postgres - 32767 параметров
+BULK_CHUNK_ROWS = 1000
+
+
+def _chunks(items: list, size: int = BULK_CHUNK_ROWS):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _result(index: int, task_id, status: str) -> dict:
+    return {"index": index, "task_id": task_id, "status": status}
+
+
+async def bulk_create_tasks(session: AsyncSession, user_id: int, tasks: List[TaskCreate]) -> List[dict]:
+    results = [None] * len(tasks)
+    pending = []
+    seen_names = set()
+    for index, task in enumerate(tasks):
+        # name уникален во всей таблице; дубликат внутри пакета сразу помечаем конфликтом
+        if task.name in seen_names:
+            results[index] = _result(index, None, "conflict")
+            continue
+        seen_names.add(task.name)
+        pending.append((index, task))
+
+    for chunk in _chunks(pending):
+        stmt = (
+            insert(Task)
+            .values([
+                {
+                    "name": task.name,
+                    "description": task.description,
+                    "startime": task.startime,
+                    "finishtime": task.finishtime,
+                    "checked": task.checked,
+                    "user_id": user_id,
+                }
+                for _, task in chunk
+            ])
+            .on_conflict_do_nothing(index_elements=["name"])
+            .returning(Task.id, Task.name)
+        )
+        created = {name: task_id for task_id, name in (await session.execute(stmt)).all()}
+        for index, task in chunk:
+            task_id = created.get(task.name)
+            results[index] = _result(index, task_id, "created" if task_id is not None else "conflict")
+
+    return results
+
+
+async def bulk_update_tasks(session: AsyncSession, user_id: int, tasks: List[TaskUpdateItem]) -> List[dict]:
+    results = [None] * len(tasks)
+    pending = []
+    seen_ids = set()
+    for index, task in enumerate(tasks):
+        if task.id in seen_ids:
+            results[index] = _result(index, task.id, "duplicate")
+            continue
+        seen_ids.add(task.id)
+        pending.append((index, task))
+
+    for chunk in _chunks(pending):
+        # UPDATE tasks SET ... FROM (VALUES ...) AS v WHERE tasks.id = v.id; NULL - поле не меняется
+        rows = values(
+            column("id", Integer),
+            column("name", String),
+            column("description", Text),
+            column("startime", DateTime),
+            column("finishtime", DateTime),
+            column("checked", Boolean),
+            name="v",
+        ).data([
+            (task.id, task.name, task.description, task.startime, task.finishtime, task.checked)
+            for _, task in chunk
+        ])
+        stmt = (
+            update(Task)
+            .where(Task.id == rows.c.id, Task.user_id == user_id)
+            .values(
+                # CAST нужен, если в колонке пакета одни NULL и Postgres вывел для неё тип text
+                name=func.coalesce(cast(rows.c.name, String), Task.name),
+                description=func.coalesce(cast(rows.c.description, Text), Task.description),
+                startime=func.coalesce(cast(rows.c.startime, DateTime), Task.startime),
+                finishtime=func.coalesce(cast(rows.c.finishtime, DateTime), Task.finishtime),
+                checked=func.coalesce(cast(rows.c.checked, Boolean), Task.checked),
+                version=Task.version + 1,
+            )
+            .returning(Task.id)
+        )
+        updated = set((await session.execute(stmt)).scalars().all())
+        for index, task in chunk:
+            results[index] = _result(index, task.id, "updated" if task.id in updated else "not_found")
+
+    return results
+
+
+async def bulk_delete_tasks(session: AsyncSession, user_id: int, task_ids: List[int]) -> List[dict]:
+    # Один параметр-массив вместо IN (...) с параметром на каждый id
+    stmt = (
+        delete(Task)
+        .where(Task.user_id == user_id, Task.id == any_(literal(list(set(task_ids)), ARRAY(Integer))))
+        .returning(Task.id)
+    )
+    deleted = set((await session.execute(stmt)).scalars().all())
+
+    results = []
+    seen_ids = set()
+    for index, task_id in enumerate(task_ids):
+        # Повтор id в пакете - duplicate, как и в bulk_update_tasks, удалён он или нет
+        if task_id in seen_ids:
+            results.append(_result(index, task_id, "duplicate"))
+            continue
+        seen_ids.add(task_id)
+        results.append(_result(index, task_id, "deleted" if task_id in deleted else "not_found"))
+
+    return results
@@ -0,0 +1,22 @@
+from fastapi import HTTPException
+from typing import Optional, Set
+
+
+def make_etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def parse_if_match(if_match: Optional[str]) -> Optional[Set[int]]:
+    """Версии из заголовка If-Match; None - проверять версию не нужно."""
+    if if_match is None or if_match.strip() == "*":
+        return None
+    versions = set()
+    for tag in if_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        try:
+            versions.add(int(tag.strip('"')))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Некорректный заголовок If-Match")
+    return versions
@@ -0,0 +1,21 @@
+from fastapi import HTTPException
+from datetime import datetime
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(startime: datetime, task_id: int) -> str:
+    raw = json.dumps([startime.isoformat(), task_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        startime, task_id = json.loads(raw)
+        return datetime.fromisoformat(startime), int(task_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
@@ -0,0 +1,41 @@
+"""Запросы задач по времени: окно, просроченные и ближайшие.
+
+Выражение периода совпадает с выражением индекса ix_tasks_user_id_period,
+иначе Postgres не сможет им воспользоваться. Просроченные и ближайшие
+задачи читаются по частичным индексам WHERE NOT checked в порядке индекса.
+"""
+from datetime import datetime
+from sqlalchemy import func, literal_column
+from sqlalchemy.future import select
+from sqlalchemy.sql import Select
+from models import Task
+
+WINDOW_MODES = ("overlap", "within")
+
+# Границы включительно, как и в индексе; константа, а не параметр - так выражение совпадает при generic-плане
+_BOUNDS = literal_column("'[]'")
+
+
+def task_period():
+    return func.tsrange(func.least(Task.startime, Task.finishtime), func.greatest(Task.startime, Task.finishtime),
+                        _BOUNDS)
+
+
+def build_window_query(user_id: int, date_from: datetime, date_to: datetime, mode: str) -> Select:
+    window = func.tsrange(date_from, date_to, _BOUNDS)
+    # overlap - задача хоть частично попадает в окно, within - целиком внутри окна
+    condition = task_period().op("&&")(window) if mode == "overlap" else task_period().op("<@")(window)
+    return select(Task).where(Task.user_id == user_id, condition)
+
+
+def build_overdue_query(user_id: int, now: datetime) -> Select:
+    # Порядок (finishtime, id) задаёт read_page вместе с курсором
+    return select(Task).where(Task.user_id == user_id, ~Task.checked, Task.finishtime < now)
+
+
+def build_upcoming_query(user_id: int, now: datetime) -> Select:
+    return (
+        select(Task)
+        .where(Task.user_id == user_id, ~Task.checked, Task.startime >= now)
+        .order_by(Task.startime, Task.id)
+    )
@@ -0,0 +1,78 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+import os
+
+# Максимум операций в одном пакетном запросе; больший массив отклоняется ещё при разборе тела
+MAX_BULK_ITEMS = int(os.getenv("MAX_BULK_ITEMS", "5000"))
+
+
+class TaskCreate(BaseModel):
+    name: str
+    description: str
+    startime: datetime
+    finishtime: datetime
+    checked: bool
+
+
+class TaskRead(BaseModel):
+    id: int
+    name: str
+    description: str
+    startime: datetime
+    finishtime: datetime
+    checked: bool
+    user_id: int
+    version: int
+
+    class Config:
+        orm_mode = True
+
+
+class TaskPage(BaseModel):
+    items: List[TaskRead]
+    next_cursor: Optional[str] = None
+
+
+class TaskSearchPage(BaseModel):
+    items: List[TaskRead]
+    next_offset: Optional[int] = None
+
+
+class TaskSummary(BaseModel):
+    total: int
+    done: int
+    pending: int
+    overdue: int
+    next_deadline: Optional[datetime] = None
+
+
+class TaskUpdateItem(BaseModel):
+    id: int
+    name: Optional[str] = None
+    description: Optional[str] = None
+    startime: Optional[datetime] = None
+    finishtime: Optional[datetime] = None
+    checked: Optional[bool] = None
+
+
+class BulkCreate(BaseModel):
+    tasks: List[TaskCreate] = Field(max_length=MAX_BULK_ITEMS)
+
+
+class BulkUpdate(BaseModel):
+    tasks: List[TaskUpdateItem] = Field(max_length=MAX_BULK_ITEMS)
+
+
+class BulkDelete(BaseModel):
+    ids: List[int] = Field(max_length=MAX_BULK_ITEMS)
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    task_id: Optional[int] = None
+    status: str
+
+
+class BulkResult(BaseModel):
+    results: List[BulkItemResult]
@@ -0,0 +1,25 @@
+"""Поиск задач пользователя по имени и описанию.
+
+Совпадения ищутся по tsvector-колонке search_vector (GIN-индекс) и по
+триграммному сходству имени (pg_trgm), так что находятся и слова из
+описания, и имена с опечатками. Сортировка по сумме ts_rank_cd и similarity.
+"""
+from sqlalchemy import func, literal_column, or_
+from sqlalchemy.future import select
+from sqlalchemy.sql import Select
+from models import Task
+
+SEARCH_CONFIG = "simple"
+
+
+def build_search_query(user_id: int, text: str) -> Select:
+    ts_query = func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'"), text)
+    rank = func.ts_rank_cd(Task.search_vector, ts_query) + func.similarity(Task.name, text)
+    return (
+        select(Task)
+        .where(
+            Task.user_id == user_id,
+            or_(Task.search_vector.op("@@")(ts_query), Task.name.op("%")(text)),
+        )
+        .order_by(rank.desc(), Task.id)
+    )
@@ -0,0 +1,49 @@
+"""Сводка по задачам пользователя для шапки панели.
+
+Все счётчики считаются одним агрегатом с FILTER по индексу user_id.
+Результат кэшируется по user_id до ближайшего дедлайна (после него
+меняются overdue и next_deadline), но не дольше SUMMARY_CACHE_TTL.
+Обработчики изменения задач сбрасывают запись через invalidate_summary.
+Кэш у каждого процесса свой: изменения с других воркеров видны не позже TTL.
+"""
+from datetime import datetime, timezone
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from models import Task
+from common.cache import TTLCache
+import os
+
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "10000"))
+SUMMARY_CACHE_TTL = float(os.getenv("SUMMARY_CACHE_TTL", "30"))
+
+summary_cache = TTLCache(maxsize=SUMMARY_CACHE_SIZE, ttl=SUMMARY_CACHE_TTL)
+
+
+def invalidate_summary(*user_ids: int):
+    for user_id in user_ids:
+        summary_cache.pop(user_id)
+
+
+async def get_summary(session: AsyncSession, user_id: int) -> dict:
+    summary = summary_cache.get(user_id)
+    if summary is not None:
+        return summary
+
+    now = datetime.utcnow()
+    open_task = ~Task.checked
+    query = select(
+        func.count().label("total"),
+        func.count().filter(Task.checked).label("done"),
+        func.count().filter(open_task).label("pending"),
+        func.count().filter(open_task, Task.finishtime < now).label("overdue"),
+        func.min(Task.finishtime).filter(open_task, Task.finishtime >= now).label("next_deadline"),
+    ).where(Task.user_id == user_id)
+    row = (await session.execute(query)).one()
+
+    summary = dict(row._mapping)
+    expires_at = None
+    if row.next_deadline is not None:
+        expires_at = row.next_deadline.replace(tzinfo=timezone.utc).timestamp()
+    summary_cache.set(user_id, summary, expires_at=expires_at)
+    return summary
@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from jose import jwt
+from pydantic import ValidationError
+import asyncio
+import pytest
+
+from common.tokens import ALGORITHM, SECRET_KEY
+from bulk import bulk_create_tasks, bulk_delete_tasks, bulk_update_tasks
+from main import app, check_bulk_size
+from schemas import MAX_BULK_ITEMS, BulkCreate, BulkDelete, BulkUpdate, TaskCreate, TaskUpdateItem
+
+# Все проверки запросов ниже срабатывают до первого запроса в БД
+client = TestClient(app)
+
+
+class _Result:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+    def scalars(self):
+        return self
+
+
+class _Session:
+    """Отдаёт заранее заданные строки RETURNING по одной пачке на каждый execute."""
+
+    def __init__(self, *returning):
+        self.returning = list(returning)
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return _Result(self.returning.pop(0))
+
+
+def _headers() -> dict:
+    token = jwt.encode({"sub": "tester", "user_id": 1, "exp": datetime.utcnow() + timedelta(minutes=5)},
+                       SECRET_KEY, algorithm=ALGORITHM)
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _task(name: str = "task") -> dict:
+    return {"name": name, "description": "", "startime": "2024-01-01T10:00:00",
+            "finishtime": "2024-01-01T11:00:00", "checked": False}
+
+
+def _statuses(results: list) -> list:
+    return [(item["index"], item["task_id"], item["status"]) for item in results]
+
+
+def test_create_reports_in_batch_and_existing_name_conflicts():
+    tasks = [TaskCreate(**_task(name)) for name in ("a", "taken", "a", "c")]
+    # "taken" уже есть в таблице: ON CONFLICT DO NOTHING не вернул для него строку
+    session = _Session([(10, "a"), (11, "c")])
+    results = asyncio.run(bulk_create_tasks(session, 1, tasks))
+    assert _statuses(results) == [(0, 10, "created"), (1, None, "conflict"), (2, None, "conflict"), (3, 11, "created")]
+    assert len(session.statements) == 1
+
+
+def test_update_reports_missing_foreign_and_duplicate_ids():
+    tasks = [TaskUpdateItem(id=task_id, checked=True) for task_id in (1, 2, 1, 3)]
+    # id 2 - чужая или несуществующая задача, UPDATE её не вернул
+    results = asyncio.run(bulk_update_tasks(_Session([1, 3]), 1, tasks))
+    assert _statuses(results) == [(0, 1, "updated"), (1, 2, "not_found"), (2, 1, "duplicate"), (3, 3, "updated")]
+
+
+def test_delete_reports_duplicates_whether_or_not_deleted():
+    results = asyncio.run(bulk_delete_tasks(_Session([1]), 1, [1, 2, 2, 1, 3]))
+    assert _statuses(results) == [
+        (0, 1, "deleted"), (1, 2, "not_found"), (2, 2, "duplicate"), (3, 1, "duplicate"), (4, 3, "not_found"),
+    ]
+
+
+def test_empty_batch_is_rejected():
+    check_bulk_size([1])
+    with pytest.raises(HTTPException) as exc_info:
+        check_bulk_size([])
+    assert exc_info.value.status_code == 400
+
+
+def test_bulk_schemas_parse_items():
+    assert BulkCreate(tasks=[_task()]).tasks[0].startime == datetime(2024, 1, 1, 10)
+    update = BulkUpdate(tasks=[{"id": 5, "checked": True}]).tasks[0]
+    assert (update.id, update.checked, update.name) == (5, True, None)
+    assert BulkDelete(ids=[1, 2]).ids == [1, 2]
+    assert len(BulkDelete(ids=list(range(MAX_BULK_ITEMS))).ids) == MAX_BULK_ITEMS
+
+
+@pytest.mark.parametrize("schema, payload", [
+    (BulkCreate, {"tasks": [{"name": "no dates"}]}),
+    (BulkUpdate, {"tasks": [{"name": "no id"}]}),
+    (BulkDelete, {"ids": ["one"]}),
+    (BulkCreate, {"tasks": [_task()] * (MAX_BULK_ITEMS + 1)}),
+    (BulkUpdate, {"tasks": [{"id": 1}] * (MAX_BULK_ITEMS + 1)}),
+    (BulkDelete, {"ids": list(range(MAX_BULK_ITEMS + 1))}),
+])
+def test_bulk_schemas_reject_invalid_batches(schema, payload):
+    with pytest.raises(ValidationError):
+        schema.model_validate(payload)
+
+
+@pytest.mark.parametrize("method, url, body", [
+    ("POST", "/post_user_tasks/", {"tasks": []}),
+    ("PATCH", "/update_user_tasks/", {"tasks": []}),
+    ("DELETE", "/delete_user_tasks/", {"ids": []}),
+])
+def test_bulk_endpoints_reject_empty_batch(method, url, body):
+    response = client.request(method, url, json=body, headers=_headers())
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("body", [
+    {"tasks": [_task(), {"name": "broken"}]},
+    {"tasks": [_task(str(index)) for index in range(MAX_BULK_ITEMS + 1)]},
+])
+def test_bulk_endpoint_rejects_invalid_batch(body):
+    response = client.post("/post_user_tasks/", json=body, headers=_headers())
+    assert response.status_code == 422
+
+
+def test_bulk_endpoint_requires_token():
+    response = client.post("/post_user_tasks/", json={"tasks": [_task()]})
+    assert response.status_code == 401
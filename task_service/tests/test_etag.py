@@ -0,0 +1,80 @@
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+import asyncio
+import pytest
+
+from etag import make_etag, parse_if_match
+from main import FOREIGN_KEY_VIOLATION, precondition_error, update_integrity_error
+
+
+class _Result:
+    def __init__(self, row):
+        self.row = row
+
+    def first(self):
+        return self.row
+
+
+class _Session:
+    """Отвечает на единственный SELECT в precondition_error заранее заданной строкой."""
+
+    def __init__(self, row):
+        self.row = row
+        self.executed = 0
+
+    async def execute(self, query):
+        self.executed += 1
+        return _Result(self.row)
+
+
+class _DriverError(Exception):
+    def __init__(self, sqlstate):
+        super().__init__(sqlstate)
+        self.sqlstate = sqlstate
+
+
+def test_etag_round_trip():
+    assert parse_if_match(make_etag(3)) == {3}
+
+
+@pytest.mark.parametrize("header", [None, "*", " * "])
+def test_if_match_without_version_check(header):
+    assert parse_if_match(header) is None
+
+
+def test_if_match_list_and_weak_tags():
+    assert parse_if_match('"1", W/"2",  "3"') == {1, 2, 3}
+
+
+@pytest.mark.parametrize("header", ['"abc"', '"1", nope', ""])
+def test_malformed_if_match_is_bad_request(header):
+    with pytest.raises(HTTPException) as exc_info:
+        parse_if_match(header)
+    assert exc_info.value.status_code == 400
+
+
+def test_precondition_without_if_match_is_not_found_without_query():
+    session = _Session(row=(1,))
+    error = asyncio.run(precondition_error(session, 1, 1, None))
+    assert error.status_code == 404
+    assert session.executed == 0
+
+
+def test_precondition_version_mismatch():
+    error = asyncio.run(precondition_error(_Session(row=(1,)), 1, 1, {2}))
+    assert error.status_code == 412
+
+
+def test_precondition_missing_or_foreign_task():
+    error = asyncio.run(precondition_error(_Session(row=None), 1, 1, {2}))
+    assert error.status_code == 404
+
+
+def test_integrity_error_foreign_key_is_unprocessable():
+    error = update_integrity_error(IntegrityError("UPDATE", {}, _DriverError(FOREIGN_KEY_VIOLATION)))
+    assert error.status_code == 422
+
+
+def test_integrity_error_unique_name_is_conflict():
+    error = update_integrity_error(IntegrityError("UPDATE", {}, _DriverError("23505")))
+    assert error.status_code == 409
@@ -0,0 +1,134 @@
+from datetime import datetime
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+from types import SimpleNamespace
+import asyncio
+import base64
+import pytest
+import re
+
+from main import get_user_tasks, read_page
+from models import Task
+from pagination import decode_cursor, encode_cursor
+from schedule import build_overdue_query
+
+
+def test_cursor_round_trip():
+    startime = datetime(2024, 3, 1, 12, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(startime, 42)) == (startime, 42)
+
+
+def test_cursor_is_url_safe_without_padding():
+    cursor = encode_cursor(datetime(2024, 1, 1), 7)
+    assert "=" not in cursor
+    assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-a-cursor",
+    "",
+    base64.urlsafe_b64encode(b'["2024-01-01T00:00:00"]').decode(),
+    base64.urlsafe_b64encode(b'["yesterday", 1]').decode(),
+    base64.urlsafe_b64encode(b'["2024-01-01T00:00:00", "x"]').decode(),
+    base64.urlsafe_b64encode(b'{"a": 1}').decode(),
+])
+def test_malformed_cursor_is_bad_request(cursor):
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(cursor)
+    assert exc_info.value.status_code == 400
+
+
+class _Result:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class _Session:
+    """Запоминает выполненный запрос и отдаёт заранее заданные строки."""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.query = None
+
+    async def execute(self, query):
+        self.query = query
+        return _Result(self.rows)
+
+
+def _compiled(query):
+    return query.compile(dialect=postgresql.dialect())
+
+
+def _get_user_tasks(session, limit=10, cursor=None, checked=None, date_from=None, date_to=None):
+    return asyncio.run(get_user_tasks(limit=limit, cursor=cursor, checked=checked, date_from=date_from,
+                                      date_to=date_to, user_id=7, session=session))
+
+
+def test_first_page_query_orders_once_and_reads_one_extra_row():
+    session = _Session()
+    _get_user_tasks(session, limit=10)
+    compiled = _compiled(session.query)
+    sql = str(compiled)
+    assert sql.count("ORDER BY") == 1
+    assert "ORDER BY tasks.startime, tasks.id" in sql
+    assert "tasks.user_id = " in sql
+    assert " > " not in sql
+    assert 11 in compiled.params.values()
+
+
+def test_next_page_query_uses_keyset_predicate():
+    startime = datetime(2024, 5, 1, 9)
+    session = _Session()
+    _get_user_tasks(session, limit=5, cursor=encode_cursor(startime, 42))
+    compiled = _compiled(session.query)
+    assert re.search(r"\(tasks\.startime, tasks\.id\) > \(%\(\w+\)s[^,]*, %\(\w+\)s[^)]*\)", str(compiled))
+    assert startime in compiled.params.values()
+    assert 42 in compiled.params.values()
+    assert 6 in compiled.params.values()
+
+
+def test_page_query_applies_checked_and_date_filters():
+    date_from, date_to = datetime(2024, 1, 1), datetime(2024, 2, 1)
+    session = _Session()
+    _get_user_tasks(session, checked=False, date_from=date_from, date_to=date_to)
+    compiled = _compiled(session.query)
+    sql = str(compiled)
+    assert "tasks.checked = false" in sql
+    assert "tasks.startime >= " in sql
+    assert "tasks.startime < " in sql
+    assert {date_from, date_to} <= set(compiled.params.values())
+
+
+def test_page_filters_are_optional():
+    session = _Session()
+    _get_user_tasks(session)
+    sql = str(_compiled(session.query))
+    assert "tasks.checked" not in sql.split("FROM tasks", 1)[1]
+    assert "tasks.startime >=" not in sql
+
+
+def test_next_cursor_points_at_last_returned_row():
+    rows = [SimpleNamespace(id=index, startime=datetime(2024, 1, index)) for index in range(1, 4)]
+    page = _get_user_tasks(_Session(rows), limit=2)
+    assert [row.id for row in page["items"]] == [1, 2]
+    assert decode_cursor(page["next_cursor"]) == (datetime(2024, 1, 2), 2)
+
+
+def test_last_page_has_no_cursor():
+    rows = [SimpleNamespace(id=1, startime=datetime(2024, 1, 1))]
+    assert _get_user_tasks(_Session(rows), limit=2)["next_cursor"] is None
+
+
+def test_read_page_replaces_builder_order():
+    session = _Session()
+    asyncio.run(read_page(session, build_overdue_query(7, datetime(2024, 1, 1)).order_by(Task.startime), 10, None,
+                          Task.finishtime))
+    sql = str(_compiled(session.query))
+    assert sql.count("ORDER BY") == 1
+    assert "ORDER BY tasks.finishtime, tasks.id" in sql
@@ -1,6 +1,6 @@
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import JWTError, jwt
+from jose import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -8,13 +8,30 @@ from sqlalchemy.future import select
 from models import User
 from database import get_session
 from blacklisted_tokens import is_token_blacklisted
+from common.cache import TTLCache
+from common.tokens import ALGORITHM, SECRET_KEY, decode_token
+import os
+import uuid
 
-SECRET_KEY = "secret-key"
-ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login/")
 
+# Кэш проверенных пользователей по токену, чтобы не ходить в БД на каждый запрос
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+
+
+def invalidate_token(token: str):
+    principal_cache.pop(token)
+
+
+def invalidate_user(username: str):
+    # Вызывать при изменении роли или данных пользователя
+    principal_cache.evict_where(lambda user: user.username == username)
+
 
 async def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -22,32 +39,31 @@ async def create_access_token(data: dict, expires_delta: Optional[timedelta] = N
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
 async def get_current_user(token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_session)):
-    if is_token_blacklisted(token):
+    payload = decode_token(token)
+    if await is_token_blacklisted(token, payload):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token has been revoked",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    result = await session.execute(select(User).where(User.username == username))
+    user = principal_cache.get(token)
+    if user is not None:
+        return user
+    result = await session.execute(select(User).where(User.username == payload["sub"]))
     user = result.scalar_one_or_none()
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    # Отвязываем объект от сессии запроса, дальше он используется только для чтения
+    session.expunge(user)
+    principal_cache.set(token, user, expires_at=payload.get("exp"))
     return user
@@ -1,11 +1,16 @@
-from typing import Set
+from jose import jwt
+from models import RevokedToken
+from database import async_session
+from common.revocation import create_revocation_list, token_expires_at, token_key
 
-blacklisted_tokens: Set[str] = set()
+revocation_list = create_revocation_list(async_session, RevokedToken)
 
 
-def blacklist_token(token: str):
-    blacklisted_tokens.add(token)
+async def blacklist_token(token: str):
+    # Токен уже проверен get_current_user, здесь нужны только jti и exp
+    payload = jwt.get_unverified_claims(token)
+    await revocation_list.revoke(token_key(token, payload), token_expires_at(payload))
 
 
-def is_token_blacklisted(token: str) -> bool:
-    return token in blacklisted_tokens
+async def is_token_blacklisted(token: str, payload: dict) -> bool:
+    return await revocation_list.is_token_revoked(token, payload)
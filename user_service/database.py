@@ -1,13 +1,10 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-import os
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from common.database import create_engine_from_env, pool_statistics as engine_pool_statistics
 
-DATABASE_URL = os.getenv("DATABASE_URL")
-
-if DATABASE_URL is None:
-    raise ValueError("DATABASE_URL не установлен. Проверьте настройки в docker-compose.yml")
+SERVICE_NAME = "user_service"
 
 # Создаем асинхронный движок
-engine = create_async_engine(DATABASE_URL, echo=True)
+engine = create_engine_from_env(SERVICE_NAME)
 
 # Создаем асинхронную сессию
 async_session = async_sessionmaker(
@@ -15,6 +12,10 @@ async_session = async_sessionmaker(
 )
 
 
+def pool_statistics() -> dict:
+    return engine_pool_statistics(engine)
+
+
 # Функция для получения сессии
 async def get_session():
     async with async_session() as session:
@@ -1,13 +1,120 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from common.metrics import HASH_DURATION, HASH_POOL_QUEUED, HASH_POOL_RUNNING, HASH_QUEUE_DURATION
+import asyncio
+import base64
 import hashlib
+import hmac
+import os
+import time
 
+# Общая соль старого формата хешей (str(bytes) без параметров), нужна только для проверки
 salt = b'\xb7t\xc4\xdb\xf5\x92\xb5\x0b\x95\x81\xea.0\x94\x19\xf1#\xe5\xc2\xcc\xa3\x1eV\xa9\x03y?|\xfd\xa1\xc7\x93'
 
+HASH_ALGORITHM = "pbkdf2_sha256"
+HASH_ITERATIONS = int(os.getenv("HASH_ITERATIONS", "100000"))
+HASH_SALT_BYTES = 16
 
-def hpassw(password):
-    key = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, 100000)
-    return key
+# process - отдельные процессы (не держат GIL), thread - потоки (hashlib отпускает GIL)
+HASH_POOL_KIND = os.getenv("HASH_POOL_KIND", "process")
+HASH_POOL_WORKERS = int(os.getenv("HASH_POOL_WORKERS", str(os.cpu_count() or 1)))
+# Сколько хеширований может одновременно ждать или выполняться в пуле
+HASH_MAX_CONCURRENCY = int(os.getenv("HASH_MAX_CONCURRENCY", str(HASH_POOL_WORKERS * 2)))
 
+_executor = None
+_semaphore = None
 
-def check_hash_key(password):
-    key = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, 100000)
-    return key
+
+def _pbkdf2(password: str, password_salt: bytes, iterations: int) -> bytes:
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), password_salt, iterations)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        if HASH_POOL_KIND == "thread":
+            _executor = ThreadPoolExecutor(max_workers=HASH_POOL_WORKERS, thread_name_prefix="hash")
+        else:
+            _executor = ProcessPoolExecutor(max_workers=HASH_POOL_WORKERS)
+    return _executor
+
+
+def _get_semaphore():
+    # Создаётся лениво, чтобы привязаться к циклу событий uvicorn
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(HASH_MAX_CONCURRENCY)
+    return _semaphore
+
+
+async def _run_in_pool(func, *args):
+    loop = asyncio.get_running_loop()
+    semaphore = _get_semaphore()
+
+    queued_at = time.perf_counter()
+    with HASH_POOL_QUEUED.track_inprogress():
+        await semaphore.acquire()
+
+    HASH_QUEUE_DURATION.observe(time.perf_counter() - queued_at)
+    started = time.perf_counter()
+    try:
+        with HASH_POOL_RUNNING.track_inprogress():
+            return await loop.run_in_executor(_get_executor(), func, *args)
+    finally:
+        HASH_DURATION.observe(time.perf_counter() - started)
+        semaphore.release()
+
+
+def shutdown_hash_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+
+def _encode(iterations: int, password_salt: bytes, key: bytes) -> str:
+    return "$".join([
+        HASH_ALGORITHM,
+        str(iterations),
+        base64.b64encode(password_salt).decode(),
+        base64.b64encode(key).decode(),
+    ])
+
+
+def _decode(stored: str):
+    algorithm, iterations, password_salt, key = stored.split("$")
+    if algorithm != HASH_ALGORITHM:
+        raise ValueError(f"Неизвестный алгоритм хеша: {algorithm}")
+    return int(iterations), base64.b64decode(password_salt), base64.b64decode(key)
+
+
+def is_legacy_hash(stored: str) -> bool:
+    return not stored.startswith(HASH_ALGORITHM + "$")
+
+
+async def hash_password(password: str) -> str:
+    password_salt = os.urandom(HASH_SALT_BYTES)
+    key = await _run_in_pool(_pbkdf2, password, password_salt, HASH_ITERATIONS)
+    return _encode(HASH_ITERATIONS, password_salt, key)
+
+
+async def verify_password(password: str, stored: str) -> bool:
+    if is_legacy_hash(stored):
+        key = await _run_in_pool(_pbkdf2, password, salt, 100000)
+        return hmac.compare_digest(str(key).encode(), stored.encode())
+
+    try:
+        iterations, password_salt, expected = _decode(stored)
+    except ValueError:
+        return False
+    key = await _run_in_pool(_pbkdf2, password, password_salt, iterations)
+    return hmac.compare_digest(key, expected)
+
+
+def needs_rehash(stored: str) -> bool:
+    if is_legacy_hash(stored):
+        return True
+    try:
+        iterations, _, _ = _decode(stored)
+    except ValueError:
+        return True
+    return iterations < HASH_ITERATIONS
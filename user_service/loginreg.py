@@ -1,9 +1,18 @@
 from fastapi import HTTPException, status
 import re
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.future import select
-from models import User
-from hash_passw import hpassw
+from models import OutboxEvent, User
+from database import async_session
+from common.outbox import add_event
+from common.events import Event, EventType
+from hash_passw import hash_password, verify_password, needs_rehash
+from authmodul import invalidate_user
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 def is_valid_email(email: str) -> bool:
@@ -19,40 +28,60 @@ async def check_user_credentials(login: str, passw: str, session: AsyncSession):
         print(f"Пользователь с логином {login} не найден.")
         return None
 
-    hashed_password = str(hpassw(passw))
-    if hashed_password != user.password:
+    if not await verify_password(passw, user.password):
         print(f"Пароль для пользователя {login} неверный.")
         return None
 
+    # Хеш старого формата или с устаревшим числом итераций пересчитываем, пока пароль известен
+    # Отдельная сессия, чтобы ошибка здесь не откатывала и не экспайрила объект user
+    if needs_rehash(user.password):
+        try:
+            new_password = await hash_password(passw)
+            async with async_session() as rehash_session:
+                await rehash_session.execute(update(User).where(User.id == user.id).values(password=new_password))
+                await rehash_session.commit()
+            # В кэше принципалов мог остаться объект со старым хешем
+            invalidate_user(login)
+        except Exception as e:
+            logger.error(f"Не удалось обновить хеш пароля пользователя {login}: {e}")
+
     return user
 
 
 async def register_user(login: str, email: str, password: str, session: AsyncSession):
-
-    result = await session.execute(select(User).where(User.username == login))
-    existing_user = result.scalars().first()
-
-    result2 = await session.execute(select(User).where(User.email == email))
-    existing_user_em = result2.scalars().first()
-
-
-    if existing_user:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Данное имя занято")
-
-
-    hashed_password = str(hpassw(password))
     if not is_valid_email(email):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Данный email некорректен")
-    elif existing_user_em:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Данный email занят")
 
-    new_user = User(username=login, email=email, password=hashed_password, role="user")
-    session.add(new_user)
+    hashed_password = await hash_password(password)
+
+    # Проверка уникальности и вставка одним запросом, без гонки между SELECT и INSERT
+    stmt = (
+        insert(User)
+        .values(username=login, email=email, password=hashed_password, role="user")
+        .on_conflict_do_nothing()
+        .returning(User)
+    )
     try:
+        result = await session.execute(stmt)
+        new_user = result.scalar_one_or_none()
+        if new_user is None:
+            await session.rollback()
+            raise await conflict_error(login, session)
+        add_event(session, OutboxEvent, Event(EventType.USER_REGISTERED, user_id=new_user.id))
         await session.commit()
-        await session.refresh(new_user)
+    except HTTPException:
+        raise
     except Exception as e:
         await session.rollback()
+        logger.error(f"Ошибка при регистрации пользователя {login}: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Регистрация не удалась")
 
     return new_user
+
+
+async def conflict_error(login: str, session: AsyncSession) -> HTTPException:
+    # Запрос только на пути ошибки: выясняем, занято имя или email
+    result = await session.execute(select(User.id).where(User.username == login))
+    if result.first() is not None:
+        return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Данное имя занято")
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Данный email занят")
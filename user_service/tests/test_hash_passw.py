@@ -0,0 +1,87 @@
+import asyncio
+import base64
+import hmac
+import pytest
+
+import hash_passw
+from hash_passw import (HASH_ALGORITHM, HASH_ITERATIONS, _decode, _encode, hash_password, is_legacy_hash,
+                        needs_rehash, verify_password)
+
+# Хеш старого формата, как он лежит в существующих строках users.password:
+# str() от pbkdf2_sha256("old-password", общая соль, 100000 итераций)
+LEGACY_HASH = r"b'\xee\xc0+\x85P\xb5\xe3\x0bc~\xe3u>57\x87\xc4j\xc5Z\x90\xd1\xad7%%\xcaD\xbeP\x8a\xb1'"
+
+
+def _verify(password: str, stored: str) -> bool:
+    return asyncio.run(verify_password(password, stored))
+
+
+def test_encode_decode_round_trip():
+    stored = _encode(1000, b"salt-bytes", b"key-bytes")
+    algorithm, iterations, salt, key = stored.split("$")
+    assert algorithm == HASH_ALGORITHM == "pbkdf2_sha256"
+    assert iterations == "1000"
+    assert base64.b64decode(salt) == b"salt-bytes"
+    assert base64.b64decode(key) == b"key-bytes"
+    assert _decode(stored) == (1000, b"salt-bytes", b"key-bytes")
+
+
+def test_decode_rejects_unknown_algorithm():
+    with pytest.raises(ValueError):
+        _decode("bcrypt$1000$c2FsdA==$a2V5")
+
+
+def test_hash_password_uses_current_format_and_random_salt():
+    first = asyncio.run(hash_password("secret"))
+    second = asyncio.run(hash_password("secret"))
+    assert first != second
+    assert _decode(first)[0] == HASH_ITERATIONS
+    assert not is_legacy_hash(first)
+    assert not needs_rehash(first)
+
+
+def test_verify_current_hash():
+    stored = asyncio.run(hash_password("secret"))
+    assert _verify("secret", stored)
+    assert not _verify("Secret", stored)
+
+
+def test_verify_legacy_hash():
+    assert is_legacy_hash(LEGACY_HASH)
+    assert _verify("old-password", LEGACY_HASH)
+    assert not _verify("wrong-password", LEGACY_HASH)
+
+
+def test_verify_hash_with_other_iteration_count():
+    salt = b"0123456789abcdef"
+    stored = _encode(1000, salt, hash_passw._pbkdf2("secret", salt, 1000))
+    assert _verify("secret", stored)
+    assert needs_rehash(stored)
+
+
+def test_wrong_password_is_compared_in_constant_time(monkeypatch):
+    calls = []
+    original = hmac.compare_digest
+
+    def compare_digest(a, b):
+        calls.append((a, b))
+        return original(a, b)
+
+    monkeypatch.setattr(hash_passw.hmac, "compare_digest", compare_digest)
+    stored = asyncio.run(hash_password("secret"))
+    assert not _verify("wrong", stored)
+    assert not _verify("wrong", LEGACY_HASH)
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("stored", ["pbkdf2_sha256$broken", "pbkdf2_sha256$x$c2FsdA==$a2V5"])
+def test_malformed_hash_is_rejected_and_rehashed(stored):
+    assert not _verify("secret", stored)
+    assert needs_rehash(stored)
+
+
+def test_needs_rehash():
+    assert needs_rehash(LEGACY_HASH)
+    assert needs_rehash(_encode(HASH_ITERATIONS - 1, b"s", b"k"))
+    assert not needs_rehash(_encode(HASH_ITERATIONS, b"s", b"k"))
+    assert not needs_rehash(_encode(HASH_ITERATIONS + 1, b"s", b"k"))